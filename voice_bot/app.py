@@ -5,51 +5,337 @@ Provides REST endpoints for the voice bot functionality
 import os
 import sys
 import base64
-from datetime import datetime
-from flask import Flask, request, jsonify, send_from_directory
+import logging
+import queue
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from logging.handlers import QueueHandler, QueueListener
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
-from werkzeug.utils import secure_filename
+
+# Try to import orjson - it's optional
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from modules.speech_to_text import SpeechToText
-from modules.text_to_speech import TextToSpeech
 from modules.intent_recognizer import IntentRecognizer
 from modules.response_generator import ResponseGenerator
 from config.settings import Config
 
-app = Flask(__name__, static_folder='static')
-CORS(app)
+# Request threads only enqueue log records; a listener thread formats and writes them
+_log_stream_handler = logging.StreamHandler()
+_log_stream_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+_log_queue_handler = QueueHandler(queue.Queue(-1))
+_log_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+_log_listener = None
+
+
+def _start_log_listener():
+    """
+    Start this process's log listener on a fresh queue
+
+    The listener thread does not survive fork (e.g. `gunicorn --preload`), so
+    every forked worker starts its own; a new queue avoids inheriting locks the
+    parent's listener may have held mid-fork.
+    """
+    global _log_listener
+    _log_queue_handler.queue = queue.Queue(-1)
+    _log_listener = QueueListener(_log_queue_handler.queue, _log_stream_handler)
+    _log_listener.start()
+
+
+_start_log_listener()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_start_log_listener)
+logging.basicConfig(handlers=[_log_queue_handler], level=logging.INFO)
+logger = logging.getLogger(__name__)
+
 
-# Initialize bot components
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson's C encoder"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response instead of re-encoding a str
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        return self._app.response_class(body, mimetype='application/json')
+
+
+app = Flask(__name__, static_folder='static')
+if ORJSON_AVAILABLE:
+    app.json = OrjsonProvider(app)
+# Only the configured frontend may call the API; browsers cache preflights for a day
+CORS(app, resources={r"/api/*": {
+    "origins": [origin.strip() for origin in Config.FRONTEND_ORIGIN.split(',')],
+    "max_age": 86400
+}})
+
+# Initialize lightweight bot components; Google Cloud clients are created on first use
 try:
-    Config.validate()
-    stt = SpeechToText()
-    tts = TextToSpeech()
+    config_valid = Config.validate()
     intent_recognizer = IntentRecognizer()
     response_generator = ResponseGenerator()
-    print("Voice Bot API initialized successfully!")
+    logger.info("Voice Bot API initialized successfully!")
 except Exception as e:
-    print(f"Error initializing Voice Bot API: {str(e)}")
-    stt = None
-    tts = None
+    logger.error("Error initializing Voice Bot API: %s", e)
+    config_valid = False
     intent_recognizer = None
     response_generator = None
 
-# Create necessary directories
-UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'data', 'uploads')
-OUTPUT_FOLDER = os.path.join(os.path.dirname(__file__), 'data', 'audio')
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+# Lazily created heavy components, keyed by name, and the last error of any that failed to build
+_components = {}
+_component_errors = {}
+_components_lock = threading.Lock()
 
 ALLOWED_EXTENSIONS = {'wav', 'mp3', 'webm', 'ogg'}
 
+# Serialized greeting response, built when the TTS cache is warmed
+_greeting_body = None
+
+# Process-wide workers shared by all pipeline stages (STT requests, TTS prewarm)
+_PIPELINE_EXECUTOR = ThreadPoolExecutor(max_workers=16)
+
+# Seconds an upload waits for its transcription before the request fails with 504
+STT_RESULT_TIMEOUT = 60
+
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def _get_component(name, factory):
+    """
+    Return a shared component, creating it on first use
+
+    Keeps the Google Cloud and embedding imports off worker startup, so
+    `gunicorn --preload` forks workers without initializing any clients.
+
+    Args:
+        name (str): Component name
+        factory (callable): Creates the component
+
+    Returns:
+        The component instance (may be None if the factory returns None)
+    """
+    if name not in _components:
+        with _components_lock:
+            if name not in _components:
+                try:
+                    _components[name] = factory()
+                except Exception as e:
+                    _component_errors[name] = str(e)
+                    raise
+                _component_errors.pop(name, None)
+    return _components[name]
+
+
+def _component_status(name):
+    """Health status of a lazily created component: 'ready', 'failed' or 'not_started'"""
+    if _components.get(name) is not None:
+        return 'ready'
+    if name in _component_errors:
+        return 'failed'
+    return 'not_started'
+
+
+def _create_stt():
+    from modules.speech_to_text import SpeechToText
+    stt = SpeechToText()
+    # Connect in the background so the first upload doesn't pay the handshake
+    _PIPELINE_EXECUTOR.submit(stt.warm_up)
+    return stt
+
+
+def _create_tts():
+    from modules.text_to_speech import TextToSpeech
+    tts = TextToSpeech()
+    # Warm the TTS cache in the background once a client exists
+    _PIPELINE_EXECUTOR.submit(_prewarm_tts_cache)
+    return tts
+
+
+def _create_semantic_cache():
+    from modules.semantic_cache import SemanticCache, SENTENCE_TRANSFORMERS_AVAILABLE
+    return SemanticCache() if SENTENCE_TRANSFORMERS_AVAILABLE else None
+
+
+def _get_stt():
+    return _get_component('stt', _create_stt)
+
+
+def _get_tts():
+    return _get_component('tts', _create_tts)
+
+
+def _get_semantic_cache():
+    return _get_component('semantic_cache', _create_semantic_cache)
+
+
+def _synthesize(text):
+    """
+    Synthesize text to speech (TextToSpeech caches the audio per voice and audio settings)
+
+    Args:
+        text (str): Text to convert to speech
+
+    Returns:
+        bytes: Audio in the TTS output format, or None if synthesis failed
+    """
+    return _get_tts().synthesize_speech_bytes(text)
+
+
+def _base64(audio):
+    """Base64 text of audio bytes for JSON bodies (None stays None)"""
+    return base64.b64encode(audio).decode('ascii') if audio else None
+
+
+def _prewarm_tts_cache():
+    """Synthesize the greeting and all canned responses ahead of the first request"""
+    phrases = [Config.GREETING_MESSAGE]
+    for templates in Config.RESPONSE_TEMPLATES.values():
+        phrases.extend(templates)
+
+    for phrase in phrases:
+        _synthesize(phrase)
+
+    _build_greeting_body()
+
+
+def _build_greeting_body():
+    """
+    Serialize the /api/greeting JSON body once, so the endpoint does no work per request
+
+    Returns:
+        str: JSON body, or None if the greeting could not be synthesized
+    """
+    global _greeting_body
+    if _greeting_body is None:
+        audio = _synthesize(Config.GREETING_MESSAGE)
+        if audio:
+            _greeting_body = app.json.dumps({
+                'text': Config.GREETING_MESSAGE,
+                'audio_base64': _base64(audio)
+            })
+    return _greeting_body
+
+
+def _build_response(user_text):
+    """
+    Run a user utterance through intent recognition, response generation and TTS
+
+    Near-duplicate utterances with the same entities are answered from the semantic cache.
+
+    Args:
+        user_text (str): User input text
+
+    Returns:
+        Tuple[Dict, bytes]: (response payload without the audio, response audio or None)
+    """
+    semantic_cache = _get_semantic_cache()
+    embedding = None
+    if semantic_cache is not None:
+        # Embed once; a miss reuses the embedding for insert()
+        embedding = semantic_cache.encode(user_text)
+        cached = semantic_cache.lookup(user_text, embedding)
+        if cached is not None:
+            entities = intent_recognizer.extract_entities(user_text)
+            payload = cached['payload']
+            if payload['entities'] == entities:
+                # Keep the conversation context current, as analyze_query would
+                intent_recognizer.update_context(payload['intent'], entities)
+                return dict(payload, user_text=user_text), cached['audio']
+
+    # Analyze intent
+    analysis = intent_recognizer.analyze_query(user_text)
+
+    # Generate response
+    response_text = response_generator.generate_response(
+        analysis['intent'],
+        analysis['entities'],
+        analysis['context']
+    )
+
+    # Generate audio response (templates are already cached by _prewarm_tts_cache)
+    audio = _synthesize(response_text)
+
+    result = {
+        'user_text': user_text,
+        'intent': analysis['intent'],
+        'confidence': analysis['confidence'],
+        'entities': analysis['entities'],
+        'response_text': response_text
+    }
+
+    if semantic_cache is not None and audio:
+        semantic_cache.insert(user_text, {'payload': result, 'audio': audio}, embedding)
+
+    return result, audio
+
+
+def _wants_multipart():
+    """Check whether the client asked for a streamed multipart/mixed response"""
+    best = request.accept_mimetypes.best_match(['application/json', 'multipart/mixed'])
+    return best == 'multipart/mixed'
+
+
+def _audio_response(payload, audio_key, audio):
+    """
+    Build the response for a payload and its synthesized audio
+
+    Clients sending `Accept: multipart/mixed` get the payload as a JSON part followed
+    by the raw audio as a part of the TTS MIME type (audio/mpeg by default), streamed
+    as each part is ready. Everyone else gets the usual single JSON object, with the
+    audio base64-encoded under audio_key.
+
+    Args:
+        payload (Dict): Response payload, without the audio
+        audio_key (str): JSON field for the base64 audio
+        audio (bytes): Synthesized audio, or None
+
+    Returns:
+        Response: Flask response
+    """
+    if not _wants_multipart():
+        return jsonify(dict(payload, **{audio_key: _base64(audio)}))
+
+    boundary = uuid.uuid4().hex
+    mime_type = _get_tts().mime_type
+
+    def generate():
+        yield (f'--{boundary}\r\nContent-Type: application/json\r\n\r\n'
+               f'{app.json.dumps(payload)}\r\n').encode('utf-8')
+        if audio:
+            yield f'--{boundary}\r\nContent-Type: {mime_type}\r\n\r\n'.encode('utf-8')
+            yield audio
+            yield b'\r\n'
+        yield f'--{boundary}--\r\n'.encode('utf-8')
+
+    return Response(stream_with_context(generate()),
+                    mimetype=f'multipart/mixed; boundary={boundary}')
+
+
+@app.before_request
+def handle_preflight():
+    """Answer CORS preflights for existing API routes early (flask-cors adds the headers)"""
+    # Other paths, and unknown URLs (no url_rule), go through normal routing and 404s
+    if (request.method == 'OPTIONS' and request.url_rule is not None
+            and request.path.startswith('/api/')):
+        return '', 204
+
+
 @app.route('/')
 def index():
     """Serve the main frontend page"""
@@ -58,13 +344,19 @@ def index():
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """
+    Health check endpoint
+
+    'stt'/'tts' report whether their clients were built ('not_started' until the
+    first request that needs them); 'configured' only says credentials validated.
+    """
     return jsonify({
         'status': 'healthy',
         'bot_name': Config.BOT_NAME if Config else 'Voice Bot',
+        'configured': config_valid,
         'services': {
-            'stt': stt is not None,
-            'tts': tts is not None,
+            'stt': _component_status('stt'),
+            'tts': _component_status('tts'),
             'intent_recognizer': intent_recognizer is not None,
             'response_generator': response_generator is not None
         }
@@ -90,6 +382,8 @@ def process_text():
         "response_text": "...",
         "response_audio_base64": "..."
     }
+
+    With `Accept: multipart/mixed` the audio is streamed as a separate audio part.
     """
     try:
         data = request.get_json()
@@ -98,38 +392,11 @@ def process_text():
         if not user_text:
             return jsonify({'error': 'No text provided'}), 400
 
-        # Analyze intent
-        analysis = intent_recognizer.analyze_query(user_text)
-
-        # Generate response
-        response_text = response_generator.generate_response(
-            analysis['intent'],
-            analysis['entities'],
-            analysis['context']
-        )
-
-        # Generate audio response
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        audio_file = os.path.join(OUTPUT_FOLDER, f'response_{timestamp}.mp3')
-        tts.synthesize_speech(response_text, audio_file)
-
-        # Read audio file and encode to base64
-        with open(audio_file, 'rb') as f:
-            audio_base64 = base64.b64encode(f.read()).decode('utf-8')
-
-        return jsonify({
-            'user_text': user_text,
-            'intent': analysis['intent'],
-            'confidence': analysis['confidence'],
-            'entities': analysis['entities'],
-            'response_text': response_text,
-            'response_audio_base64': audio_base64
-        })
+        payload, audio = _build_response(user_text)
+        return _audio_response(payload, 'response_audio_base64', audio)
 
     except Exception as e:
-        print(f"Error processing text: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error processing text")
         return jsonify({'error': str(e)}), 500
 
 
@@ -149,6 +416,8 @@ def process_audio():
         "response_text": "...",
         "response_audio_base64": "..."
     }
+
+    With `Accept: multipart/mixed` the audio is streamed as a separate audio part.
     """
     try:
         if 'audio' not in request.files:
@@ -162,73 +431,45 @@ def process_audio():
         if not allowed_file(audio_file.filename):
             return jsonify({'error': 'Invalid file format'}), 400
 
-        # Save uploaded audio file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = secure_filename(f'input_{timestamp}.wav')
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        audio_file.save(filepath)
-
-        # Transcribe audio
-        user_text = stt.transcribe_audio_file(filepath)
+        # Transcribe the uploaded audio straight from memory (no disk round-trip), on the
+        # shared pool so a stuck request times out instead of hanging this thread
+        try:
+            user_text = _PIPELINE_EXECUTOR.submit(
+                _get_stt().transcribe_audio_stream, audio_file.read()).result(timeout=STT_RESULT_TIMEOUT)
+        except FutureTimeoutError:
+            logger.error("Transcription timed out after %ss", STT_RESULT_TIMEOUT)
+            return jsonify({'error': 'Transcription timed out'}), 504
 
         if not user_text:
             return jsonify({'error': 'Failed to transcribe audio'}), 500
 
-        # Analyze intent
-        analysis = intent_recognizer.analyze_query(user_text)
-
-        # Generate response
-        response_text = response_generator.generate_response(
-            analysis['intent'],
-            analysis['entities'],
-            analysis['context']
-        )
-
-        # Generate audio response
-        response_audio_file = os.path.join(OUTPUT_FOLDER, f'response_{timestamp}.mp3')
-        tts.synthesize_speech(response_text, response_audio_file)
-
-        # Read audio file and encode to base64
-        with open(response_audio_file, 'rb') as f:
-            audio_base64 = base64.b64encode(f.read()).decode('utf-8')
-
-        return jsonify({
-            'user_text': user_text,
-            'intent': analysis['intent'],
-            'confidence': analysis['confidence'],
-            'entities': analysis['entities'],
-            'response_text': response_text,
-            'response_audio_base64': audio_base64
-        })
+        payload, audio = _build_response(user_text)
+        return _audio_response(payload, 'response_audio_base64', audio)
 
     except Exception as e:
-        print(f"Error processing audio: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error processing audio")
         return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/greeting', methods=['GET'])
 def get_greeting():
-    """Get the greeting message"""
+    """Get the greeting message (streamed as multipart/mixed if requested)"""
     try:
         greeting = Config.GREETING_MESSAGE
 
-        # Generate audio greeting
-        audio_file = os.path.join(OUTPUT_FOLDER, 'greeting.mp3')
-        tts.synthesize_speech(greeting, audio_file)
+        # Serve the prebuilt JSON body unless the client wants a stream
+        if not _wants_multipart():
+            body = _build_greeting_body()
+            if body is not None:
+                return Response(body, mimetype='application/json')
 
-        # Read audio file and encode to base64
-        with open(audio_file, 'rb') as f:
-            audio_base64 = base64.b64encode(f.read()).decode('utf-8')
+        # Generate audio greeting
+        audio = _synthesize(greeting)
 
-        return jsonify({
-            'text': greeting,
-            'audio_base64': audio_base64
-        })
+        return _audio_response({'text': greeting}, 'audio_base64', audio)
 
     except Exception as e:
-        print(f"Error getting greeting: {str(e)}")
+        logger.exception("Error getting greeting")
         return jsonify({'error': str(e)}), 500
 
 
@@ -240,6 +481,7 @@ if __name__ == '__main__':
     print("API will be available at: http://localhost:5000")
     print("Frontend will be available at: http://localhost:5000")
     print("\nPress Ctrl+C to stop the server")
+    print("For production, serve wsgi.py with gunicorn (see SETUP_GUIDE.md)")
     print("=" * 60 + "\n")
 
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app.run(host='0.0.0.0', port=5000)
@@ -2,8 +2,17 @@
 Configuration settings for the Voice Bot
 """
 import os
+import re
+import numpy as np
 from dotenv import load_dotenv
 
+# Try to import pyahocorasick - it's optional
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 load_dotenv()
 
 class Config:
@@ -21,9 +30,35 @@ class Config:
 
     # Text-to-Speech Configuration
     VOICE_NAME = os.getenv('VOICE_NAME', 'en-US-Standard-A')
+    # Synthesized audio format: mp3, opus (smallest over the wire) or linear16 (WAV)
+    TTS_AUDIO_ENCODING = os.getenv('TTS_AUDIO_ENCODING', 'mp3')
+
+    # Upper bound on concurrent Google/OpenAI requests made by the async batch helpers
+    API_CONCURRENCY = int(os.getenv('API_CONCURRENCY', 10))
+
+    # gRPC channel options for the shared STT/TTS clients: keepalive pings keep the
+    # connection (and its TLS session) warm between bursts of requests
+    GRPC_CHANNEL_OPTIONS = (
+        ('grpc.max_send_message_length', -1),
+        ('grpc.max_receive_message_length', -1),
+        ('grpc.keepalive_time_ms', int(os.getenv('GRPC_KEEPALIVE_TIME_MS', 30000))),
+        ('grpc.keepalive_timeout_ms', 10000),
+        ('grpc.keepalive_permit_without_calls', 1),
+        ('grpc.http2.max_pings_without_data', 0),
+    )
+
+    # Persistent STT/TTS result cache (needs diskcache). Off unless SPEECH_CACHE_DIR is set,
+    # since it keeps user transcripts and synthesized replies on disk
+    SPEECH_CACHE_DIR = os.path.expanduser(os.getenv('SPEECH_CACHE_DIR', ''))
+    SPEECH_CACHE_TTL = int(os.getenv('SPEECH_CACHE_TTL', 7 * 86400))
+
+    # Web API Configuration (comma-separated list of allowed browser origins)
+    FRONTEND_ORIGIN = os.getenv('FRONTEND_ORIGIN', 'http://localhost:5000')
 
     # Bot Configuration
     BOT_NAME = "CustomerBot"
+    # Generated responses remembered per ResponseGenerator (oldest dropped first)
+    HISTORY_MAX = int(os.getenv('HISTORY_MAX', 200))
     GREETING_MESSAGE = "Hello! I am your customer service assistant. How can I help you today?"
 
     # Supported intents and their keywords
@@ -71,11 +106,125 @@ class Config:
         ]
     }
 
+    _validated = False
+
     @classmethod
     def validate(cls):
-        """Validate that required environment variables are set"""
+        """Validate that required environment variables are set (checked once per process)"""
+        if cls._validated:
+            return True
         if not cls.GOOGLE_APPLICATION_CREDENTIALS:
             raise ValueError("GOOGLE_APPLICATION_CREDENTIALS not set in environment")
         if not os.path.exists(cls.GOOGLE_APPLICATION_CREDENTIALS):
             raise ValueError(f"Google credentials file not found at: {cls.GOOGLE_APPLICATION_CREDENTIALS}")
+        cls._validated = True
         return True
+
+
+def _build_keyword_index(intent_keywords):
+    """
+    Flatten intent keywords into one keyword list plus a keyword x intent matrix
+
+    Args:
+        intent_keywords (Dict[str, frozenset]): Keywords per intent
+
+    Returns:
+        Tuple: (keywords, matrix) where matrix[k, i] is 1.0 if intent i (config order)
+            lists keywords[k]
+    """
+    keywords = tuple(sorted(frozenset().union(*intent_keywords.values())))
+    keyword_ids = {keyword: k for k, keyword in enumerate(keywords)}
+    matrix = np.zeros((len(keywords), len(intent_keywords)), dtype=np.float64)
+    for intent_id, intent_kws in enumerate(intent_keywords.values()):
+        for keyword in intent_kws:
+            matrix[keyword_ids[keyword], intent_id] = 1.0
+    return keywords, matrix
+
+
+def _build_intent_automaton(keywords):
+    """
+    Build a single Aho-Corasick automaton over all intent keywords
+
+    Args:
+        keywords (Tuple[str, ...]): Flat keyword list from _build_keyword_index
+
+    Returns:
+        ahocorasick.Automaton: Automaton yielding (keyword index, length) per match, or None if unavailable
+    """
+    if not AHOCORASICK_AVAILABLE:
+        return None
+
+    automaton = ahocorasick.Automaton()
+    for k, keyword in enumerate(keywords):
+        automaton.add_word(keyword, (k, len(keyword)))
+    automaton.make_automaton()
+    return automaton
+
+
+def _build_keyword_regex(keywords):
+    """
+    Build one regex that finds every keyword occurrence in a single scan
+
+    The lookahead alternation (longest keywords first) reports the longest keyword
+    starting at each position; every other keyword starting there is a prefix of it.
+
+    Args:
+        keywords (Tuple[str, ...]): Flat keyword list from _build_keyword_index
+
+    Returns:
+        Tuple: (compiled pattern, {keyword: (index, length) of each keyword that is a
+            prefix of it, itself included})
+    """
+    ordered = sorted(range(len(keywords)), key=lambda k: len(keywords[k]), reverse=True)
+    pattern = re.compile('(?=(' + '|'.join(re.escape(keywords[k]) for k in ordered) + '))')
+    prefixes = {
+        keywords[k]: tuple((other, len(keywords[other])) for other in ordered
+                           if keywords[k].startswith(keywords[other]))
+        for k in ordered
+    }
+    return pattern, prefixes
+
+
+def _build_keyword_table(intent_keywords):
+    """
+    Flatten intent keywords into the arrays consumed by the compiled intent scanner
+
+    Args:
+        intent_keywords (Dict[str, frozenset]): Keywords per intent
+
+    Returns:
+        Tuple: (intent_names, kw_chars, kw_offsets, kw_intent_ids)
+    """
+    intent_names = tuple(intent_keywords.keys())
+    encoded = []
+    intent_ids = []
+    for intent_id, keywords in enumerate(intent_keywords.values()):
+        for keyword in keywords:
+            encoded.append(keyword.encode('utf-8'))
+            intent_ids.append(intent_id)
+
+    kw_chars = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    kw_offsets = np.zeros(len(encoded) + 1, dtype=np.int32)
+    kw_offsets[1:] = np.cumsum([len(kw) for kw in encoded])
+    kw_intent_ids = np.asarray(intent_ids, dtype=np.int32)
+
+    return intent_names, kw_chars, kw_offsets, kw_intent_ids
+
+
+# Freeze keywords into lowercase sets once
+Config.INTENT_KEYWORDS = {
+    intent: frozenset(keyword.lower() for keyword in keywords)
+    for intent, keywords in Config.INTENT_KEYWORDS.items()
+}
+
+# Prebuilt keyword matchers for IntentRecognizer, all indexing one flat keyword list
+Config.INTENT_KEYWORD_INDEX = _build_keyword_index(Config.INTENT_KEYWORDS)
+Config.INTENT_AC = _build_intent_automaton(Config.INTENT_KEYWORD_INDEX[0])
+Config.INTENT_KEYWORD_TABLE = _build_keyword_table(Config.INTENT_KEYWORDS)
+Config.INTENT_KEYWORD_RE = _build_keyword_regex(Config.INTENT_KEYWORD_INDEX[0])
+
+# Freeze response templates into tuples so they are immutable and cheap to index
+Config.RESPONSE_TEMPLATES = {
+    intent: tuple(templates)
+    for intent, templates in Config.RESPONSE_TEMPLATES.items()
+}
@@ -3,7 +3,13 @@ Main Voice Bot - Orchestrates all modules for voice-based customer interaction
 """
 import os
 import sys
-from datetime import datetime
+import asyncio
+import hashlib
+import itertools
+import logging
+import shutil
+import tempfile
+from collections import deque
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -15,6 +21,11 @@ from modules.response_generator import ResponseGenerator
 from modules.audio_recorder import AudioRecorder, AudioPlayer
 from config.settings import Config
 
+logger = logging.getLogger(__name__)
+
+# Per-turn recordings and responses kept on disk; older ones are deleted as new turns arrive
+TURN_AUDIO_KEEP = 20
+
 
 class VoiceBot:
     """Main Voice Bot class that orchestrates all components"""
@@ -38,14 +49,23 @@ class VoiceBot:
             self.is_running = False
             self.conversation_active = False
 
+            # Unique ids for per-turn audio filenames
+            self._file_counter = itertools.count()
+
             # Create output directory for audio files
             self.output_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'audio')
             os.makedirs(self.output_dir, exist_ok=True)
 
+            # Per-turn audio is played once and then discarded, so it lives in RAM
+            # (/dev/shm) where available, in a directory removed by cleanup()
+            turn_root = '/dev/shm' if os.path.isdir('/dev/shm') else None
+            self.turn_dir = tempfile.mkdtemp(prefix='voice_bot_', dir=turn_root)
+            self._turn_files = deque()
+
             print(f"✓ Voice Bot initialized successfully as '{Config.BOT_NAME}'")
 
         except Exception as e:
-            print(f"✗ Error initializing Voice Bot: {str(e)}")
+            logger.error("Error initializing Voice Bot: %s", e)
             raise
 
     def greet_user(self):
@@ -54,10 +74,49 @@ class VoiceBot:
         print(f"\n{Config.BOT_NAME}: {greeting}")
 
         # Convert greeting to speech
-        audio_file = os.path.join(self.output_dir, 'greeting.mp3')
-        self.tts.synthesize_speech(greeting, audio_file)
+        audio_file = self._synthesize_fixed_phrase(greeting, 'greeting')
         self.audio_player.play_audio_file(audio_file)
 
+    def _synthesize_fixed_phrase(self, text, name):
+        """
+        Synthesize a fixed phrase once and reuse the audio file across sessions
+
+        Args:
+            text (str): Phrase to synthesize
+            name (str): Filename prefix
+
+        Returns:
+            str: Path to the audio file
+        """
+        # Key the file by voice and text so a config change produces fresh audio
+        digest = hashlib.blake2b(f"{self.tts.voice.name}\0{text}".encode(), digest_size=8).hexdigest()
+        audio_file = os.path.join(self.output_dir, f'{name}_{digest}.{self.tts.file_extension}')
+
+        if not os.path.exists(audio_file):
+            self.tts.synthesize_speech(text, audio_file)
+
+        return audio_file
+
+    def _turn_audio_file(self, prefix, extension):
+        """
+        Path for a per-turn audio file, deleting the oldest beyond TURN_AUDIO_KEEP
+
+        Args:
+            prefix (str): Filename prefix ('input' or 'response')
+            extension (str): File extension
+
+        Returns:
+            str: Path inside the turn audio directory
+        """
+        path = os.path.join(self.turn_dir, f'{prefix}_{next(self._file_counter)}.{extension}')
+        self._turn_files.append(path)
+        while len(self._turn_files) > TURN_AUDIO_KEEP:
+            try:
+                os.unlink(self._turn_files.popleft())
+            except FileNotFoundError:
+                pass
+        return path
+
     def process_voice_input(self, audio_file_path):
         """
         Process voice input through the complete pipeline
@@ -66,7 +125,8 @@ class VoiceBot:
             audio_file_path (str): Path to the audio file
 
         Returns:
-            Dict: Processing results
+            Dict: Processing results ('response_audio' is a per-turn file, deleted once
+                TURN_AUDIO_KEEP newer turn files exist or on cleanup())
         """
         print("\n--- Processing Voice Input ---")
 
@@ -75,7 +135,7 @@ class VoiceBot:
         user_text = self.stt.transcribe_audio_file(audio_file_path)
 
         if not user_text:
-            print("✗ Failed to transcribe audio")
+            logger.warning("Failed to transcribe audio")
             return None
 
         print(f"   User said: '{user_text}'")
@@ -103,8 +163,7 @@ class VoiceBot:
 
         # Step 4: Text to Speech
         print("4. Converting response to speech...")
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        response_audio_file = os.path.join(self.output_dir, f'response_{timestamp}.mp3')
+        response_audio_file = self._turn_audio_file('response', self.tts.file_extension)
         self.tts.synthesize_speech(response_text, response_audio_file)
 
         print("✓ Processing complete\n")
@@ -118,6 +177,53 @@ class VoiceBot:
             'response_audio': response_audio_file
         }
 
+    def process_voice_batch(self, audio_file_paths):
+        """
+        Process several recorded utterances, overlapping their STT and TTS requests
+
+        Args:
+            audio_file_paths (List[str]): Paths to the audio files
+
+        Returns:
+            List[Dict]: Processing results per file, in input order (None where transcription failed).
+                'response_audio' files are per-turn files, as in process_voice_input, so
+                only the newest TURN_AUDIO_KEEP of them are kept
+        """
+        return asyncio.run(self._process_voice_batch(audio_file_paths))
+
+    async def _process_voice_batch(self, audio_file_paths):
+        """Run every utterance's pipeline concurrently, with at most API_CONCURRENCY requests in flight"""
+        semaphore = asyncio.Semaphore(Config.API_CONCURRENCY)
+
+        async def process(audio_file_path):
+            async with semaphore:
+                user_text = await self.stt.transcribe_audio_file_async(audio_file_path)
+            if not user_text:
+                logger.warning("Failed to transcribe %s", audio_file_path)
+                return None
+
+            analysis = self.intent_recognizer.analyze_query(user_text)
+            response_text = self.response_generator.generate_response(
+                analysis['intent'],
+                analysis['entities'],
+                analysis['context']
+            )
+
+            response_audio_file = self._turn_audio_file('response', self.tts.file_extension)
+            async with semaphore:
+                await self.tts.synthesize_speech_async(response_text, response_audio_file)
+
+            return {
+                'user_text': user_text,
+                'intent': analysis['intent'],
+                'confidence': analysis['confidence'],
+                'entities': analysis['entities'],
+                'response_text': response_text,
+                'response_audio': response_audio_file
+            }
+
+        return list(await asyncio.gather(*(process(path) for path in audio_file_paths)))
+
     def interactive_session(self):
         """Run an interactive voice bot session"""
         print("\n" + "=" * 60)
@@ -141,8 +247,7 @@ class VoiceBot:
                 break
 
             # Record audio
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            input_audio_file = os.path.join(self.output_dir, f'input_{timestamp}.wav')
+            input_audio_file = self._turn_audio_file('input', 'wav')
 
             print("\n🎤 Recording... (Speak now, will stop after 5 seconds of recording)")
             self.audio_recorder.record_fixed_duration(5, input_audio_file)
@@ -171,8 +276,7 @@ class VoiceBot:
         farewell = "Thank you for using our service. Goodbye!"
         print(f"\n{Config.BOT_NAME}: {farewell}")
 
-        audio_file = os.path.join(self.output_dir, 'goodbye.mp3')
-        self.tts.synthesize_speech(farewell, audio_file)
+        audio_file = self._synthesize_fixed_phrase(farewell, 'goodbye')
         self.audio_player.play_audio_file(audio_file)
 
     def process_text_input(self, text):
@@ -185,6 +289,19 @@ class VoiceBot:
         Returns:
             str: Bot response
         """
+        response_text, _ = self.analyze_text_input(text)
+        return response_text
+
+    def analyze_text_input(self, text):
+        """
+        Process text input and keep the intent analysis
+
+        Args:
+            text (str): User input text
+
+        Returns:
+            Tuple[str, Dict]: (bot response, intent analysis results)
+        """
         # Intent Recognition
         analysis = self.intent_recognizer.analyze_query(text)
 
@@ -195,7 +312,7 @@ class VoiceBot:
             analysis['context']
         )
 
-        return response_text
+        return response_text, analysis
 
     def text_only_session(self):
         """Run a text-only session (no voice I/O) for testing"""
@@ -215,11 +332,10 @@ class VoiceBot:
                 break
 
             # Process text input
-            response = self.process_text_input(user_input)
+            response, analysis = self.analyze_text_input(user_input)
             print(f"{Config.BOT_NAME}: {response}\n")
 
             # Check for farewell intent
-            analysis = self.intent_recognizer.analyze_query(user_input)
             if analysis['intent'] == 'farewell':
                 self.conversation_active = False
 
@@ -232,11 +348,14 @@ class VoiceBot:
         print("\nCleaning up resources...")
         self.audio_recorder.cleanup()
         self.audio_player.cleanup()
+        shutil.rmtree(self.turn_dir, ignore_errors=True)
         print("Cleanup complete.")
 
 
 def main():
     """Main entry point for the Voice Bot"""
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(name)s: %(message)s')
+
     try:
         # Create and initialize the bot
         bot = VoiceBot()
@@ -267,9 +386,7 @@ def main():
             bot.cleanup()
 
     except Exception as e:
-        print(f"\n✗ Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Voice Bot session failed")
 
 
 if __name__ == "__main__":
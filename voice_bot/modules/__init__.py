@@ -5,11 +5,16 @@ Voice Bot Modules Package
 __version__ = "1.0.0"
 __author__ = "AI Intern Project"
 
-from .speech_to_text import SpeechToText
-from .text_to_speech import TextToSpeech
-from .intent_recognizer import IntentRecognizer
-from .response_generator import ResponseGenerator
-from .audio_recorder import AudioRecorder, AudioPlayer
+# Submodules are imported on first attribute access so that importing one
+# lightweight module does not pull in the Google Cloud and audio dependencies
+_EXPORTS = {
+    'SpeechToText': 'speech_to_text',
+    'TextToSpeech': 'text_to_speech',
+    'IntentRecognizer': 'intent_recognizer',
+    'ResponseGenerator': 'response_generator',
+    'AudioRecorder': 'audio_recorder',
+    'AudioPlayer': 'audio_recorder'
+}
 
 __all__ = [
     'SpeechToText',
@@ -19,3 +24,11 @@ __all__ = [
     'AudioRecorder',
     'AudioPlayer'
 ]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        import importlib
+        module = importlib.import_module(f'.{_EXPORTS[name]}', __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
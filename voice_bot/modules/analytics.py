@@ -3,10 +3,12 @@ Analytics module for tracking and analyzing bot performance metrics
 Tracks queries, response times, errors, and generates insights
 """
 import time
+from array import array
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
-from collections import defaultdict
+from collections import Counter, OrderedDict, deque
 import json
+import numpy as np
 
 try:
     from modules.database import Database
@@ -14,6 +16,90 @@ try:
 except ImportError:
     DATABASE_AVAILABLE = False
 
+# Try to import orjson - it's optional
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Try to import Numba - it's optional
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(cache=True)
+    def _group_stats(ids, response_times, confidences, successes, n_groups):
+        """Per-intent count, response time sum, confidence sum and success count in one pass"""
+        count = np.zeros(n_groups, dtype=np.int64)
+        rt_sum = np.zeros(n_groups, dtype=np.float64)
+        conf_sum = np.zeros(n_groups, dtype=np.float64)
+        ok = np.zeros(n_groups, dtype=np.int64)
+        for i in range(ids.shape[0]):
+            g = ids[i]
+            count[g] += 1
+            rt_sum[g] += response_times[i]
+            conf_sum[g] += confidences[i]
+            ok[g] += successes[i]
+        return count, rt_sum, conf_sum, ok
+
+else:
+
+    def _group_stats(ids, response_times, confidences, successes, n_groups):
+        """Per-intent count, response time sum, confidence sum and success count"""
+        count = np.bincount(ids, minlength=n_groups)
+        rt_sum = np.bincount(ids, weights=response_times, minlength=n_groups)
+        conf_sum = np.bincount(ids, weights=confidences, minlength=n_groups)
+        ok = np.bincount(ids, weights=successes, minlength=n_groups).astype(np.int64)
+        return count, rt_sum, conf_sum, ok
+
+
+# Raw per-query rows are kept for this long, then rolled into time buckets
+DETAIL_WINDOW_SECONDS = 300
+# (bucket span in seconds, buckets kept at that level before merging into the next)
+ROLLUP_LEVELS = ((60, 5), (300, 12), (3600, 24), (86400, None))
+# Raw intent/error events retained in memory; the running aggregates cover the rest
+MAX_INTENT_EVENTS = 10_000
+MAX_ERROR_EVENTS = 2_000
+
+
+def _pad(values, size: int):
+    """Zero-extend a per-intent array to cover newly seen intents"""
+    if values.shape[0] >= size:
+        return values
+    return np.concatenate([values, np.zeros(size - values.shape[0], dtype=values.dtype)])
+
+
+class MetricsBucket:
+    """Per-intent query aggregates for one time interval"""
+
+    __slots__ = ('start_ns', 'span_ns', 'count', 'rt_sum', 'rt_sq_sum', 'conf_sum', 'successes')
+
+    def __init__(self, start_ns, span_ns, count, rt_sum, rt_sq_sum, conf_sum, successes):
+        self.start_ns = start_ns
+        self.span_ns = span_ns
+        self.count = count
+        self.rt_sum = rt_sum
+        self.rt_sq_sum = rt_sq_sum
+        self.conf_sum = conf_sum
+        self.successes = successes
+
+    def merge(self, other: 'MetricsBucket'):
+        """Add another bucket's aggregates into this one"""
+        size = max(self.count.shape[0], other.count.shape[0])
+        for name in ('count', 'rt_sum', 'rt_sq_sum', 'conf_sum', 'successes'):
+            setattr(self, name, _pad(getattr(self, name), size) + _pad(getattr(other, name), size))
+
+
+def _format_timestamp(timestamp_ns: int) -> str:
+    """Convert a time.time_ns() event timestamp to an ISO 8601 string"""
+    return datetime.fromtimestamp(timestamp_ns / 1e9).isoformat()
+
 
 class AnalyticsTracker:
     """
@@ -28,8 +114,48 @@ class AnalyticsTracker:
             database: Database instance for persistent storage
         """
         self.database = database
-        self.in_memory_metrics = defaultdict(list)
         self.session_start = datetime.now()
+        self._reset_session_state()
+
+    def _reset_session_state(self):
+        """Reset per-query columns, bounded event logs and the running session aggregates"""
+        self.in_memory_metrics = {
+            'intents': deque(maxlen=MAX_INTENT_EVENTS),
+            'errors': deque(maxlen=MAX_ERROR_EVENTS)
+        }
+
+        # Per-query storage, kept as parallel columns (one entry per query)
+        self._q_timestamps = array('q')  # time.time_ns()
+        self._q_intent_ids = array('i')  # index into self._intent_names
+        self._intent_ids = {}
+        self._intent_names = []
+        self._q_confidences = array('d')
+        self._q_response_times = array('d')
+        self._q_successes = array('B')
+        self._q_error_messages = {}  # query index -> error message (rare)
+
+        # Older queries, aggregated into progressively coarser buckets per ROLLUP_LEVELS
+        self._buckets = [OrderedDict() for _ in ROLLUP_LEVELS]
+
+        # Running aggregates so session statistics don't rescan every event
+        self._total_queries = 0
+        self._successful_queries = 0
+        self._rt_sum = 0
+        self._rt_count = 0
+        self._intent_counts = Counter()
+        self._intent_conf_sum = {}
+        self._error_counts = Counter()
+        self._error_summary = {}
+        self._total_errors = 0
+
+    def _queue_metric(self, metric_name: str, metric_value: float, metadata: Optional[Dict] = None):
+        """Hand a metric to the database's background writer (never blocks on SQLite)"""
+        self.database.log_metric(metric_name, metric_value, metadata)
+
+    def flush_metrics(self):
+        """Block until every metric handed to the database has been written"""
+        if self.database:
+            self.database.flush()
 
     def track_query(self, user_query: str, intent: str, confidence: float,
                    response_time: float, success: bool = True,
@@ -48,13 +174,13 @@ class AnalyticsTracker:
         # Log to database if available
         if self.database:
             try:
-                self.database.log_metric('query_count', 1, {
+                self._queue_metric('query_count', 1, {
                     'intent': intent,
                     'confidence': confidence,
                     'success': success
                 })
 
-                self.database.log_metric('response_time', response_time, {
+                self._queue_metric('response_time', response_time, {
                     'intent': intent
                 })
 
@@ -67,22 +193,90 @@ class AnalyticsTracker:
                 print(f"Failed to log metrics to database: {e}")
 
         # Store in memory for session statistics
-        self.in_memory_metrics['queries'].append({
-            'timestamp': datetime.now().isoformat(),
-            'intent': intent,
-            'confidence': confidence,
-            'response_time': response_time,
-            'success': success,
-            'error_message': error_message
-        })
+        if error_message is not None:
+            self._q_error_messages[len(self._q_intent_ids)] = error_message
+        now_ns = time.time_ns()
+        self._q_timestamps.append(now_ns)
+        intent_id = self._intent_ids.get(intent)
+        if intent_id is None:
+            intent_id = self._intent_ids[intent] = len(self._intent_names)
+            self._intent_names.append(intent)
+        self._q_intent_ids.append(intent_id)
+        self._q_confidences.append(confidence)
+        self._q_response_times.append(response_time)
+        self._q_successes.append(1 if success else 0)
+
+        self._total_queries += 1
+        self._successful_queries += 1 if success else 0
+        if response_time:
+            self._rt_sum += response_time
+            self._rt_count += 1
+
+        # Roll old rows up once they have aged a full level-0 span past the window
+        if now_ns - self._q_timestamps[0] > (DETAIL_WINDOW_SECONDS + ROLLUP_LEVELS[0][0]) * 10**9:
+            self._roll_up(now_ns - DETAIL_WINDOW_SECONDS * 10**9)
+
+    def _roll_up(self, cutoff_ns: int):
+        """Aggregate queries recorded before cutoff_ns into level-0 buckets and drop their rows"""
+        timestamps = np.array(self._q_timestamps, dtype=np.int64)
+        recent = timestamps >= cutoff_ns
+        n_old = int(recent.argmax()) if recent.any() else len(timestamps)
+        if not n_old:
+            return
+
+        ids = np.array(self._q_intent_ids[:n_old], dtype=np.int32)
+        response_times = np.array(self._q_response_times[:n_old], dtype=np.float64)
+        confidences = np.array(self._q_confidences[:n_old], dtype=np.float64)
+        successes = np.array(self._q_successes[:n_old], dtype=np.uint8)
+        n_groups = len(self._intent_names)
+
+        # One bucket per level-0 span the old rows fall into
+        span_ns = ROLLUP_LEVELS[0][0] * 10**9
+        keys = timestamps[:n_old] // span_ns
+        bounds = [0, *(np.flatnonzero(np.diff(keys)) + 1), n_old]
+        for start, stop in zip(bounds, bounds[1:]):
+            count, rt_sum, conf_sum, ok = _group_stats(
+                ids[start:stop], response_times[start:stop], confidences[start:stop],
+                successes[start:stop], n_groups
+            )
+            rt_sq_sum = np.bincount(ids[start:stop], weights=response_times[start:stop] ** 2,
+                                    minlength=n_groups)
+            self._add_bucket(0, MetricsBucket(int(keys[start]) * span_ns, span_ns,
+                                              count, rt_sum, rt_sq_sum, conf_sum, ok))
+
+        for column in (self._q_timestamps, self._q_intent_ids, self._q_response_times,
+                       self._q_confidences, self._q_successes):
+            del column[:n_old]
+        self._q_error_messages = {index - n_old: message
+                                  for index, message in self._q_error_messages.items()
+                                  if index >= n_old}
+
+    def _add_bucket(self, level: int, bucket: MetricsBucket):
+        """Insert a bucket at a level, merging the oldest buckets upward once the level is full"""
+        buckets = self._buckets[level]
+        existing = buckets.get(bucket.start_ns)
+        if existing is not None:
+            existing.merge(bucket)
+        else:
+            buckets[bucket.start_ns] = bucket
+
+        keep = ROLLUP_LEVELS[level][1]
+        while keep is not None and len(buckets) > keep:
+            _, oldest = buckets.popitem(last=False)
+            span_ns = ROLLUP_LEVELS[level + 1][0] * 10**9
+            oldest.start_ns = oldest.start_ns // span_ns * span_ns
+            oldest.span_ns = span_ns
+            self._add_bucket(level + 1, oldest)
 
     def track_intent(self, intent: str, confidence: float):
         """Track intent recognition"""
         self.in_memory_metrics['intents'].append({
             'intent': intent,
             'confidence': confidence,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': time.time_ns()
         })
+        self._intent_counts[intent] += 1
+        self._intent_conf_sum[intent] = self._intent_conf_sum.get(intent, 0) + confidence
 
     def track_error(self, error_type: str, error_message: str, context: Dict = None):
         """
@@ -99,12 +293,23 @@ class AnalyticsTracker:
             except Exception as e:
                 print(f"Failed to log error: {e}")
 
+        timestamp = time.time_ns()
         self.in_memory_metrics['errors'].append({
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': timestamp,
             'type': error_type,
             'message': error_message,
             'context': context
         })
+        self._error_counts[error_type] += 1
+        self._total_errors += 1
+
+        summary = self._error_summary.get(error_type)
+        if summary is None:
+            summary = self._error_summary[error_type] = {'latest_occurrence': None, 'sample_messages': []}
+        summary['latest_occurrence'] = timestamp
+        # Keep only the first 3 sample messages
+        if len(summary['sample_messages']) < 3:
+            summary['sample_messages'].append(error_message)
 
     def get_session_statistics(self) -> Dict:
         """
@@ -113,38 +318,19 @@ class AnalyticsTracker:
         Returns:
             Dict: Session statistics
         """
-        queries = self.in_memory_metrics.get('queries', [])
-        intents = self.in_memory_metrics.get('intents', [])
-        errors = self.in_memory_metrics.get('errors', [])
-
-        total_queries = len(queries)
-        successful_queries = sum(1 for q in queries if q['success'])
+        total_queries = self._total_queries
+        successful_queries = self._successful_queries
         failed_queries = total_queries - successful_queries
 
-        # Calculate average response time
-        response_times = [q['response_time'] for q in queries if q['response_time']]
-        avg_response_time = sum(response_times) / len(response_times) if response_times else 0
-
-        # Intent distribution
-        intent_counts = defaultdict(int)
-        for item in intents:
-            intent_counts[item['intent']] += 1
+        # Average response time over queries that reported one
+        avg_response_time = self._rt_sum / self._rt_count if self._rt_count else 0
 
         # Average confidence by intent
-        intent_confidences = defaultdict(list)
-        for item in intents:
-            intent_confidences[item['intent']].append(item['confidence'])
-
         avg_confidence_by_intent = {
-            intent: sum(confidences) / len(confidences)
-            for intent, confidences in intent_confidences.items()
+            intent: conf_sum / self._intent_counts[intent]
+            for intent, conf_sum in self._intent_conf_sum.items()
         }
 
-        # Error types
-        error_counts = defaultdict(int)
-        for error in errors:
-            error_counts[error['type']] += 1
-
         session_duration = (datetime.now() - self.session_start).total_seconds()
 
         return {
@@ -155,10 +341,10 @@ class AnalyticsTracker:
             'failed_queries': failed_queries,
             'success_rate': (successful_queries / total_queries * 100) if total_queries > 0 else 0,
             'average_response_time': avg_response_time,
-            'intent_distribution': dict(intent_counts),
+            'intent_distribution': dict(self._intent_counts),
             'average_confidence_by_intent': avg_confidence_by_intent,
-            'total_errors': len(errors),
-            'error_types': dict(error_counts),
+            'total_errors': self._total_errors,
+            'error_types': dict(self._error_counts),
             'queries_per_minute': (total_queries / (session_duration / 60)) if session_duration > 0 else 0
         }
 
@@ -175,45 +361,44 @@ class AnalyticsTracker:
         if not self.database:
             return {'error': 'Database not available'}
 
+        self.flush_metrics()
+
         try:
             start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
 
             # Get query metrics
             query_metrics = self.database.get_metrics_summary('query_count', start_date=start_date)
-            response_time_metrics = self.database.get_metrics_summary('response_time', start_date=start_date)
+            response_time_stats = self.database.get_metrics_aggregated(
+                'response_time', start_date=start_date, bucket=None
+            )
 
             total_queries = len(query_metrics)
-            successful_queries = sum(1 for m in query_metrics
-                                   if m['metadata'] and m['metadata'].get('success'))
 
-            # Calculate average response time
-            avg_response_time = (sum(m['metric_value'] for m in response_time_metrics) /
-                               len(response_time_metrics) if response_time_metrics else 0)
+            # Average response time, computed by SQLite
+            avg_response_time = response_time_stats[0]['average'] if response_time_stats else 0
 
-            # Intent distribution
-            intent_counts = defaultdict(int)
-            intent_confidences = defaultdict(list)
+            # Successes and intent distribution in a single pass
+            successful_queries = 0
+            intent_counts = Counter()
+            intent_conf_sum = {}
 
             for metric in query_metrics:
-                if metric['metadata']:
-                    intent = metric['metadata'].get('intent', 'unknown')
-                    confidence = metric['metadata'].get('confidence', 0)
+                metadata = metric['metadata']
+                if metadata:
+                    if metadata.get('success'):
+                        successful_queries += 1
+                    intent = metadata.get('intent', 'unknown')
                     intent_counts[intent] += 1
-                    intent_confidences[intent].append(confidence)
+                    intent_conf_sum[intent] = intent_conf_sum.get(intent, 0) + metadata.get('confidence', 0)
 
             avg_confidence_by_intent = {
-                intent: sum(confidences) / len(confidences)
-                for intent, confidences in intent_confidences.items()
+                intent: conf_sum / intent_counts[intent]
+                for intent, conf_sum in intent_conf_sum.items()
             }
 
             # Get error logs
-            error_logs = self.database.get_error_logs(limit=1000)
-            recent_errors = [e for e in error_logs
-                           if datetime.fromisoformat(e['timestamp']) >= datetime.fromisoformat(start_date)]
-
-            error_counts = defaultdict(int)
-            for error in recent_errors:
-                error_counts[error['error_type']] += 1
+            recent_errors = self.database.get_error_logs(limit=1000, since=start_date)
+            error_counts = Counter(error['error_type'] for error in recent_errors)
 
             return {
                 'period_days': days,
@@ -235,64 +420,46 @@ class AnalyticsTracker:
 
     def get_intent_performance(self) -> Dict:
         """Get performance metrics by intent"""
-        queries = self.in_memory_metrics.get('queries', [])
-
-        intent_stats = defaultdict(lambda: {
-            'count': 0,
-            'total_response_time': 0,
-            'total_confidence': 0,
-            'successes': 0,
-            'failures': 0
-        })
-
-        for query in queries:
-            intent = query['intent']
-            stats = intent_stats[intent]
-
-            stats['count'] += 1
-            stats['total_response_time'] += query['response_time']
-            stats['total_confidence'] += query['confidence']
-
-            if query['success']:
-                stats['successes'] += 1
-            else:
-                stats['failures'] += 1
+        n_groups = len(self._intent_names)
+        counts, rt_sums, conf_sums, successes = _group_stats(
+            np.array(self._q_intent_ids, dtype=np.int32),
+            np.array(self._q_response_times, dtype=np.float64),
+            np.array(self._q_confidences, dtype=np.float64),
+            np.array(self._q_successes, dtype=np.uint8),
+            n_groups
+        )
+
+        # Fold in queries that have already been rolled up into buckets
+        for buckets in self._buckets:
+            for bucket in buckets.values():
+                counts = counts + _pad(bucket.count, n_groups)
+                rt_sums = rt_sums + _pad(bucket.rt_sum, n_groups)
+                conf_sums = conf_sums + _pad(bucket.conf_sum, n_groups)
+                successes = successes + _pad(bucket.successes, n_groups)
 
         # Calculate averages
         result = {}
-        for intent, stats in intent_stats.items():
-            count = stats['count']
+        for intent_id, intent in enumerate(self._intent_names):
+            count = int(counts[intent_id])
             result[intent] = {
                 'count': count,
-                'avg_response_time': stats['total_response_time'] / count,
-                'avg_confidence': stats['total_confidence'] / count,
-                'success_rate': (stats['successes'] / count * 100) if count > 0 else 0
+                'avg_response_time': float(rt_sums[intent_id]) / count,
+                'avg_confidence': float(conf_sums[intent_id]) / count,
+                'success_rate': (int(successes[intent_id]) / count * 100) if count > 0 else 0
             }
 
         return result
 
     def get_error_summary(self) -> Dict:
         """Get summary of errors"""
-        errors = self.in_memory_metrics.get('errors', [])
-
-        error_summary = defaultdict(lambda: {
-            'count': 0,
-            'latest_occurrence': None,
-            'sample_messages': []
-        })
-
-        for error in errors:
-            error_type = error['type']
-            summary = error_summary[error_type]
-
-            summary['count'] += 1
-            summary['latest_occurrence'] = error['timestamp']
-
-            # Keep only last 3 sample messages
-            if len(summary['sample_messages']) < 3:
-                summary['sample_messages'].append(error['message'])
-
-        return dict(error_summary)
+        return {
+            error_type: {
+                'count': self._error_counts[error_type],
+                'latest_occurrence': _format_timestamp(summary['latest_occurrence']),
+                'sample_messages': list(summary['sample_messages'])
+            }
+            for error_type, summary in self._error_summary.items()
+        }
 
     def get_dashboard_data(self) -> Dict:
         """
@@ -317,15 +484,21 @@ class AnalyticsTracker:
         """
         data = self.get_dashboard_data()
 
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
+        if ORJSON_AVAILABLE:
+            body = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+                                | orjson.OPT_NON_STR_KEYS)
+        else:
+            body = json.dumps(data, indent=2).encode('utf-8')
+
+        with open(filepath, 'wb') as f:
+            f.write(body)
 
         print(f"Metrics exported to {filepath}")
 
     def reset_session_metrics(self):
         """Reset session metrics"""
-        self.in_memory_metrics = defaultdict(list)
         self.session_start = datetime.now()
+        self._reset_session_state()
 
 
 class MetricsCollector:
@@ -346,25 +519,23 @@ class MetricsCollector:
         self.start_time = None
         self.success = True
         self.error_message = None
+        self._metric_name = f'{operation_name}_time'
+        self._log_to_database = tracker.database is not None
 
     def __enter__(self):
-        self.start_time = time.time()
+        self.start_time = time.perf_counter()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        elapsed_time = time.time() - self.start_time
+        elapsed_time = time.perf_counter() - self.start_time
 
         if exc_type is not None:
             self.success = False
             self.error_message = str(exc_val)
 
         # Log based on operation type
-        if self.tracker.database:
-            self.tracker.database.log_metric(
-                f'{self.operation_name}_time',
-                elapsed_time,
-                {'success': self.success}
-            )
+        if self._log_to_database:
+            self.tracker._queue_metric(self._metric_name, elapsed_time, {'success': self.success})
 
         return False  # Don't suppress exceptions
 
@@ -382,6 +553,7 @@ if __name__ == "__main__":
     tracker.track_query("Unknown query", "unknown", 0.3, 1.2, False, "Low confidence")
 
     # Get statistics
+    tracker.flush_metrics()
     stats = tracker.get_session_statistics()
 
     print("Session Statistics:")
@@ -4,8 +4,60 @@ Audio Recording utility for capturing voice input
 import wave
 import pyaudio
 import os
+import queue
+import numpy as np
 from config.settings import Config
 
+# Try to import Numba - it's optional
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(cache=True, fastmath=True)
+    def _mean_abs_i16(buf):
+        """Mean absolute amplitude of int16 samples in one pass with an integer accumulator"""
+        total = 0
+        for v in buf:
+            total += abs(np.int64(v))
+        return total / buf.shape[0]
+
+    @njit(cache=True)
+    def _chan_mean_abs(buf, channels):
+        """Per-channel mean absolute amplitude of interleaved int16 samples"""
+        n = buf.shape[0] // channels
+        out = np.zeros(channels, dtype=np.float64)
+        for c in range(channels):
+            total = 0
+            for i in range(n):
+                total += abs(np.int64(buf[i * channels + c]))
+            out[c] = total / n
+        return out
+
+else:
+
+    def _mean_abs_i16(buf):
+        """Mean absolute amplitude of int16 samples"""
+        return np.abs(buf).mean()
+
+    def _chan_mean_abs(buf, channels):
+        """Per-channel mean absolute amplitude of interleaved int16 samples"""
+        n = buf.shape[0] // channels
+        return np.abs(buf[:n * channels].reshape(n, channels).astype(np.int32)).mean(axis=0)
+
+
+def _warm_up_kernels(channels):
+    """Compile the amplitude kernels now, so the first PortAudio callback doesn't pay for it"""
+    # Read-only, like the np.frombuffer() views the callback passes in (Numba
+    # compiles a separate specialization for those)
+    dummy = np.frombuffer(bytes(max(channels, 1) * 4), dtype=np.int16)
+    _mean_abs_i16(dummy)
+    _chan_mean_abs(dummy, max(channels, 1))
+
 
 class AudioRecorder:
     def __init__(self):
@@ -14,31 +66,61 @@ class AudioRecorder:
         self.channels = Config.AUDIO_CHANNELS
         self.chunk_size = Config.CHUNK_SIZE
         self.audio_format = pyaudio.paInt16
+        # Module-level lookup, so this doesn't initialize PortAudio
+        self._sample_width = pyaudio.get_sample_size(self.audio_format)
 
-        self.audio = pyaudio.PyAudio()
+        self.audio = None  # PyAudio instance, created on first use by _ensure_audio()
         self.stream = None
-        self.frames = []
+        self.audio_buffer = bytearray()  # recorded samples, grown chunk by chunk
+        self._amp_queue = queue.Queue()
+
+        _warm_up_kernels(self.channels)
+
+    def _ensure_audio(self):
+        """Initialize PortAudio on first use rather than at construction"""
+        if self.audio is None:
+            self.audio = pyaudio.PyAudio()
+        return self.audio
+
+    def start_recording(self, stream_callback=None):
+        """
+        Start recording audio
 
-    def start_recording(self):
-        """Start recording audio"""
-        self.frames = []
-        self.stream = self.audio.open(
+        Args:
+            stream_callback (callable, optional): PyAudio callback; when given,
+                PortAudio delivers chunks on its own thread instead of record_chunk()
+        """
+        self.audio_buffer = bytearray()
+        self.stream = self._ensure_audio().open(
             format=self.audio_format,
             channels=self.channels,
             rate=self.sample_rate,
             input=True,
-            frames_per_buffer=self.chunk_size
+            frames_per_buffer=self.chunk_size,
+            stream_callback=stream_callback
         )
         print("Recording started... (Press Ctrl+C or call stop_recording() to stop)")
 
     def record_chunk(self):
         """Record a single chunk of audio"""
         if self.stream:
-            data = self.stream.read(self.chunk_size)
-            self.frames.append(data)
+            data = self.stream.read(self.chunk_size, exception_on_overflow=False)
+            self.audio_buffer.extend(data)
             return data
         return None
 
+    def _pa_callback(self, in_data, frame_count, time_info, status):
+        """PyAudio callback: keep the chunk and hand its amplitude to the waiting thread"""
+        self.audio_buffer.extend(in_data)
+        samples = np.frombuffer(in_data, dtype=np.int16)
+        if self.channels == 1:
+            amplitude = _mean_abs_i16(samples)
+        else:
+            # Silent only once every channel is quiet
+            amplitude = _chan_mean_abs(samples, self.channels).max()
+        self._amp_queue.put_nowait(amplitude)
+        return (None, pyaudio.paContinue)
+
     def stop_recording(self):
         """Stop recording audio"""
         if self.stream:
@@ -57,7 +139,7 @@ class AudioRecorder:
         Returns:
             str: Path to the saved file
         """
-        if not self.frames:
+        if not self.audio_buffer:
             print("No audio data to save.")
             return None
 
@@ -67,9 +149,9 @@ class AudioRecorder:
         # Save as WAV file
         with wave.open(filename, 'wb') as wf:
             wf.setnchannels(self.channels)
-            wf.setsampwidth(self.audio.get_sample_size(self.audio_format))
+            wf.setsampwidth(self._sample_width)
             wf.setframerate(self.sample_rate)
-            wf.writeframes(b''.join(self.frames))
+            wf.writeframes(self.audio_buffer)
 
         print(f"Audio saved to: {filename}")
         return filename
@@ -84,20 +166,32 @@ class AudioRecorder:
 
         Returns:
             str: Path to the saved file
+
+        Chunks are written straight to the WAV file as they arrive rather than
+        being kept in self.audio_buffer.
         """
         print(f"Recording for {duration_seconds} seconds...")
 
-        self.start_recording()
+        # Ensure the directory exists
+        os.makedirs(os.path.dirname(output_file) if os.path.dirname(output_file) else '.', exist_ok=True)
 
         # Calculate number of chunks to record
         chunks_to_record = int(self.sample_rate / self.chunk_size * duration_seconds)
 
-        for i in range(chunks_to_record):
-            self.record_chunk()
+        with wave.open(output_file, 'wb') as wf:
+            wf.setnchannels(self.channels)
+            wf.setsampwidth(self._sample_width)
+            wf.setframerate(self.sample_rate)
 
-        self.stop_recording()
+            self.start_recording()
+            try:
+                for i in range(chunks_to_record):
+                    wf.writeframesraw(self.stream.read(self.chunk_size, exception_on_overflow=False))
+            finally:
+                self.stop_recording()
 
-        return self.save_recording(output_file)
+        print(f"Audio saved to: {output_file}")
+        return output_file
 
     def record_until_silence(self, silence_threshold=500, silence_duration=2.0, output_file=None):
         """
@@ -111,22 +205,24 @@ class AudioRecorder:
         Returns:
             str or bytes: Path to saved file or audio bytes
         """
-        import numpy as np
-
         print("Recording... (speak now, will stop after silence)")
 
-        self.start_recording()
+        # Chunks arrive through _pa_callback; this thread only wakes per amplitude
+        self._amp_queue = queue.Queue()
+        self.start_recording(stream_callback=self._pa_callback)
 
         silence_chunks = int(silence_duration * self.sample_rate / self.chunk_size)
         silent_chunk_count = 0
 
         try:
             while True:
-                data = self.record_chunk()
-
-                # Convert bytes to numpy array for amplitude analysis
-                audio_data = np.frombuffer(data, dtype=np.int16)
-                amplitude = np.abs(audio_data).mean()
+                try:
+                    amplitude = self._amp_queue.get(timeout=1.0)
+                except queue.Empty:
+                    if self.stream.is_active():
+                        continue
+                    print("Audio stream stopped unexpectedly.")
+                    break
 
                 if amplitude < silence_threshold:
                     silent_chunk_count += 1
@@ -144,7 +240,7 @@ class AudioRecorder:
         if output_file:
             return self.save_recording(output_file)
         else:
-            return b''.join(self.frames)
+            return bytes(self.audio_buffer)
 
     def get_audio_bytes(self):
         """
@@ -153,21 +249,32 @@ class AudioRecorder:
         Returns:
             bytes: Audio data
         """
-        return b''.join(self.frames)
+        return bytes(self.audio_buffer)
 
     def cleanup(self):
         """Clean up resources"""
         if self.stream:
             self.stream.close()
-        self.audio.terminate()
+        if self.audio is not None:
+            self.audio.terminate()
+            self.audio = None
 
 
 class AudioPlayer:
     """Simple audio player for playing back audio files"""
 
+    # Frames per read/write during playback, matched to PortAudio's buffer size
+    PLAYBACK_CHUNK = 8192
+
     def __init__(self):
         """Initialize the audio player"""
-        self.audio = pyaudio.PyAudio()
+        self.audio = None  # PyAudio instance, created on first use by _ensure_audio()
+
+    def _ensure_audio(self):
+        """Initialize PortAudio on first use rather than at construction"""
+        if self.audio is None:
+            self.audio = pyaudio.PyAudio()
+        return self.audio
 
     def play_audio_file(self, filename):
         """
@@ -178,19 +285,21 @@ class AudioPlayer:
         """
         try:
             with wave.open(filename, 'rb') as wf:
-                stream = self.audio.open(
-                    format=self.audio.get_format_from_width(wf.getsampwidth()),
+                audio = self._ensure_audio()
+                stream = audio.open(
+                    format=audio.get_format_from_width(wf.getsampwidth()),
                     channels=wf.getnchannels(),
                     rate=wf.getframerate(),
-                    output=True
+                    output=True,
+                    frames_per_buffer=self.PLAYBACK_CHUNK
                 )
 
                 print(f"Playing: {filename}")
 
-                data = wf.readframes(1024)
+                data = wf.readframes(self.PLAYBACK_CHUNK)
                 while data:
                     stream.write(data)
-                    data = wf.readframes(1024)
+                    data = wf.readframes(self.PLAYBACK_CHUNK)
 
                 stream.stop_stream()
                 stream.close()
@@ -210,7 +319,7 @@ class AudioPlayer:
             channels (int): Number of channels
         """
         try:
-            stream = self.audio.open(
+            stream = self._ensure_audio().open(
                 format=pyaudio.paInt16,
                 channels=channels,
                 rate=sample_rate,
@@ -224,9 +333,43 @@ class AudioPlayer:
         except Exception as e:
             print(f"Error playing audio: {str(e)}")
 
+    def play_audio_stream(self, audio_chunks, sample_rate=24000, channels=1):
+        """
+        Play 16-bit PCM chunks as they arrive (e.g. from TextToSpeech.stream_synthesize)
+
+        Args:
+            audio_chunks (Iterable[bytes]): Raw audio chunks
+            sample_rate (int): Sample rate
+            channels (int): Number of channels
+        """
+        stream = None
+        try:
+            for chunk in audio_chunks:
+                if not chunk:
+                    continue
+                if stream is None:
+                    # Opened on the first chunk, so playback starts as soon as audio exists
+                    stream = self._ensure_audio().open(
+                        format=pyaudio.paInt16,
+                        channels=channels,
+                        rate=sample_rate,
+                        output=True
+                    )
+                stream.write(chunk)
+
+        except Exception as e:
+            print(f"Error playing audio: {str(e)}")
+
+        finally:
+            if stream is not None:
+                stream.stop_stream()
+                stream.close()
+
     def cleanup(self):
         """Clean up resources"""
-        self.audio.terminate()
+        if self.audio is not None:
+            self.audio.terminate()
+            self.audio = None
 
 
 if __name__ == "__main__":
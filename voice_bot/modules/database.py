@@ -2,13 +2,237 @@
 Database module for storing conversations, user data, and FAQs
 Supports both SQLite (development) and PostgreSQL (production)
 """
+import atexit
 import os
+import queue
+import re
 import sqlite3
+import threading
+import time
 import json
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 from contextlib import contextmanager
 
+# Try to import orjson - it's optional
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+if ORJSON_AVAILABLE:
+
+    def _dumps(obj) -> str:
+        """Serialize a JSON column value with orjson"""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    _loads = orjson.loads
+
+else:
+    _dumps = json.dumps
+    _loads = json.loads
+
+# Applied to every SQLite connection; journal_mode=WAL is persistent and set once
+SQLITE_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536"
+)
+
+# Read connections kept open so SQLite's page cache survives between queries
+POOL_SIZE = 8
+
+# Queued log/message writes: rows per transaction, and how long to wait for a batch to fill
+WRITE_BATCH_SIZE = 256
+WRITE_FLUSH_TIMEOUT = 0.1
+
+# Statements run by the background writer, keyed by table
+QUEUED_WRITES = {
+    'messages': """
+        INSERT INTO messages (conversation_id, role, content, intent, confidence, entities,
+                              response_time, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+    """,
+    'analytics': """
+        INSERT INTO analytics (metric_name, metric_value, metadata, timestamp)
+        VALUES (?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+    """,
+    'error_logs': """
+        INSERT INTO error_logs (error_type, error_message, stack_trace, context, timestamp)
+        VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+    """,
+    # FAQ usage counts, bumped off the lookup path
+    'faqs': "UPDATE faqs SET usage_count = usage_count + 1 WHERE id = ?"
+}
+
+
+# FAQ keyword search index; porter stemming lets "tracking" find the keyword "track"
+FAQ_FTS_SCHEMA = (
+    """
+    CREATE VIRTUAL TABLE faqs_fts USING fts5(
+        keywords, content='faqs', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS faqs_fts_insert AFTER INSERT ON faqs BEGIN
+        INSERT INTO faqs_fts (rowid, keywords) VALUES (new.id, new.keywords);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS faqs_fts_delete AFTER DELETE ON faqs BEGIN
+        INSERT INTO faqs_fts (faqs_fts, rowid, keywords) VALUES ('delete', old.id, old.keywords);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS faqs_fts_update AFTER UPDATE OF keywords ON faqs BEGIN
+        INSERT INTO faqs_fts (faqs_fts, rowid, keywords) VALUES ('delete', old.id, old.keywords);
+        INSERT INTO faqs_fts (rowid, keywords) VALUES (new.id, new.keywords);
+    END
+    """
+)
+
+# Without FTS5: one row per FAQ keyword, kept in sync from the JSON column with json1
+FAQ_KEYWORD_SCHEMA = (
+    """
+    CREATE TABLE faq_keywords (
+        faq_id INTEGER NOT NULL,
+        keyword TEXT NOT NULL,
+        PRIMARY KEY (faq_id, keyword)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS faq_keywords_insert AFTER INSERT ON faqs BEGIN
+        INSERT OR IGNORE INTO faq_keywords (faq_id, keyword)
+        SELECT new.id, value FROM json_each(new.keywords);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS faq_keywords_delete AFTER DELETE ON faqs BEGIN
+        DELETE FROM faq_keywords WHERE faq_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS faq_keywords_update AFTER UPDATE OF keywords ON faqs BEGIN
+        DELETE FROM faq_keywords WHERE faq_id = old.id;
+        INSERT OR IGNORE INTO faq_keywords (faq_id, keyword)
+        SELECT new.id, value FROM json_each(new.keywords);
+    END
+    """
+)
+
+# FAQ content revision, bumped by triggers on every FAQ insert, delete or content edit
+# (usage counts excluded), so every process and connection sees FAQ changes
+FAQ_REVISION_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS faq_revision (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        revision INTEGER NOT NULL
+    )
+    """,
+    "INSERT OR IGNORE INTO faq_revision (id, revision) VALUES (0, 0)",
+    """
+    CREATE TRIGGER IF NOT EXISTS faq_revision_insert AFTER INSERT ON faqs BEGIN
+        UPDATE faq_revision SET revision = revision + 1 WHERE id = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS faq_revision_delete AFTER DELETE ON faqs BEGIN
+        UPDATE faq_revision SET revision = revision + 1 WHERE id = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS faq_revision_update
+    AFTER UPDATE OF question, answer, category, keywords, keywords_text ON faqs BEGIN
+        UPDATE faq_revision SET revision = revision + 1 WHERE id = 0;
+    END
+    """
+)
+
+# Fixed query texts, so each variant stays in the connection's prepared-statement cache.
+# Keyed by which of (metric_name, start_date, end_date) are given
+_METRICS_SUMMARY_SQL = {
+    (has_name, has_start, has_end): (
+        "SELECT * FROM analytics WHERE 1=1"
+        + (" AND metric_name = ?" if has_name else "")
+        + (" AND timestamp >= ?" if has_start else "")
+        + (" AND timestamp <= ?" if has_end else "")
+        + " ORDER BY timestamp DESC"
+    )
+    for has_name in (False, True)
+    for has_start in (False, True)
+    for has_end in (False, True)
+}
+
+# strftime formats for get_metrics_aggregated buckets; None aggregates the whole range
+METRIC_BUCKET_FORMATS = {
+    'minute': '%Y-%m-%d %H:%M:00',
+    'hour': '%Y-%m-%d %H:00:00',
+    'day': '%Y-%m-%d',
+    None: None
+}
+_METRICS_AGGREGATED_SQL = {
+    (bucket, has_name, has_start, has_end): (
+        "SELECT metric_name, "
+        + (f"strftime('{fmt}', timestamp)" if fmt else "NULL") + " AS bucket, "
+        "COUNT(*) AS count, AVG(metric_value) AS average, "
+        "MIN(metric_value) AS minimum, MAX(metric_value) AS maximum "
+        "FROM analytics WHERE 1=1"
+        + (" AND metric_name = ?" if has_name else "")
+        + (" AND timestamp >= ?" if has_start else "")
+        + (" AND timestamp <= ?" if has_end else "")
+        + " GROUP BY metric_name" + (", bucket" if fmt else "")
+        + " ORDER BY metric_name" + (", bucket" if fmt else "")
+    )
+    for bucket, fmt in METRIC_BUCKET_FORMATS.items()
+    for has_name in (False, True)
+    for has_start in (False, True)
+    for has_end in (False, True)
+}
+_ERROR_LOGS_SQL = "SELECT * FROM error_logs ORDER BY timestamp DESC LIMIT ?"
+_ERROR_LOGS_SINCE_SQL = "SELECT * FROM error_logs WHERE timestamp >= ? ORDER BY timestamp DESC LIMIT ?"
+
+# Stored in PRAGMA user_version once the schema is set up; bump when the schema changes
+SCHEMA_VERSION = 2
+
+# User profiles kept by the read-through cache in get_user_profile
+USER_CACHE_SIZE = 1024
+
+# Prepared statements kept per connection (sqlite3's default is 128)
+STATEMENT_CACHE_SIZE = 256
+
+# Word tokens of FAQ lookup keywords, roughly as the FTS unicode61 tokenizer splits them
+_WORD_RE = re.compile(r'\w+')
+
+
+# Joins FAQ keywords in faqs.keywords_text; keywords may contain spaces but not newlines
+KEYWORD_SEPARATOR = '\n'
+
+
+def _keywords_text(keywords: List[str]) -> str:
+    """FAQ keywords as the plain text stored in faqs.keywords_text"""
+    return KEYWORD_SEPARATOR.join(keywords)
+
+
+def _check_not_null(table: str, **columns):
+    """
+    Reject a queued row up front if a NOT NULL column is None
+
+    Queued writes are committed later on the writer thread, so the caller would
+    otherwise never see the constraint error it got from a direct INSERT.
+    """
+    for column, value in columns.items():
+        if value is None:
+            raise sqlite3.IntegrityError(f"NOT NULL constraint failed: {table}.{column}")
+
+
+def _utc_timestamp() -> str:
+    """Current UTC time in the format SQLite's CURRENT_TIMESTAMP uses"""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+
 
 class Database:
     """Database handler for voice bot data persistence"""
@@ -31,28 +255,226 @@ class Database:
         else:
             self.db_path = db_path
 
-        self._initialize_database()
+        # Pooled read connections plus one writer, created on demand
+        self._pool = queue.Queue(maxsize=POOL_SIZE)
+        self._pool_lock = threading.Lock()
+        self._pool_created = 0
+        self._writer = None
+        self._write_lock = threading.Lock()
 
-    @contextmanager
-    def get_connection(self):
-        """Context manager for database connections"""
+        # Background writer for messages and logs, started on first queued write
+        self._write_q = queue.Queue()
+        self._writer_thread = None
+        self._writer_thread_lock = threading.Lock()
+        # Queued rows that could not be written (e.g. constraint violations)
+        self.dropped_writes = 0
+
+        # Read-through caches for profiles and the FAQ list; a version is bumped on every
+        # write so a read that raced with it doesn't store what it fetched
+        self._cache_lock = threading.Lock()
+        self._user_cache = OrderedDict()
+        self._users_version = 0
+        self._faqs_cache = None
+        self._faqs_version = 0
+
+        schema_version = None
         if self.db_type == "sqlite":
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            conn = sqlite3.connect(self.db_path, isolation_level=None)
             try:
-                yield conn
-                conn.commit()
-            except Exception as e:
-                conn.rollback()
-                raise e
+                schema_version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if schema_version != SCHEMA_VERSION:
+                    # WAL turns each commit into one sequential log append and lets readers
+                    # run alongside the writer
+                    conn.execute("PRAGMA journal_mode=WAL")
             finally:
                 conn.close()
+
+        if schema_version == SCHEMA_VERSION:
+            # Already set up by an earlier run: skip the DDL and migration checks
+            self._load_schema_flags()
         else:
+            self._initialize_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a SQLite connection with the standard pragmas applied"""
+        # isolation_level=None: transactions are begun explicitly in get_connection
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        """Take a pooled read connection, opening a new one while the pool isn't full"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._pool_lock:
+            can_open = self._pool_created < POOL_SIZE
+            if can_open:
+                self._pool_created += 1
+        if can_open:
+            try:
+                return self._connect()
+            except Exception:
+                with self._pool_lock:
+                    self._pool_created -= 1
+                raise
+        return self._pool.get()
+
+    @contextmanager
+    def get_connection(self, write: bool = False):
+        """
+        Context manager for database connections; the block runs in one transaction
+
+        Args:
+            write: Use the dedicated writer connection, serialized across threads
+        """
+        if self.db_type != "sqlite":
             raise NotImplementedError("PostgreSQL support not yet implemented")
 
+        if write:
+            with self._write_lock:
+                if self._writer is None:
+                    self._writer = self._connect()
+                conn = self._writer
+                try:
+                    # Take the write lock up front so read-then-write blocks can't be refused
+                    conn.execute("BEGIN IMMEDIATE")
+                    yield conn
+                    conn.commit()
+                except BaseException:
+                    # BaseException too: an abandoned generator must not leave the
+                    # transaction open on a shared connection
+                    conn.rollback()
+                    raise
+            return
+
+        conn = self._acquire_reader()
+        try:
+            conn.execute("BEGIN")
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._pool.put(conn)
+
+    def _enqueue_write(self, table: str, row: Tuple):
+        """Queue a row for the background writer"""
+        if self._writer_thread is None:
+            with self._writer_thread_lock:
+                if self._writer_thread is None:
+                    self._writer_thread = threading.Thread(
+                        target=self._write_loop, name='database-writer', daemon=True
+                    )
+                    self._writer_thread.start()
+                    atexit.register(self.flush)
+        self._write_q.put((table, row))
+
+    def _write_loop(self):
+        """Drain queued writes, committing each batch in a single transaction"""
+        while True:
+            batch = [self._write_q.get()]
+            deadline = time.monotonic() + WRITE_FLUSH_TIMEOUT
+            while len(batch) < WRITE_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._write_q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            rows_by_table = {}
+            for table, row in batch:
+                rows_by_table.setdefault(table, []).append(row)
+
+            try:
+                self._write_batch(rows_by_table)
+                if 'faqs' in rows_by_table:
+                    self._invalidate_faqs()
+            finally:
+                for _ in batch:
+                    self._write_q.task_done()
+
+    def _write_batch(self, rows_by_table: Dict[str, List[Tuple]]):
+        """
+        Commit queued rows, falling back to smaller transactions if the batch fails
+
+        A failing batch is retried one table at a time, and a failing table one row at
+        a time, so a single bad row only loses itself. Dropped rows are counted in
+        dropped_writes.
+        """
+        try:
+            with self.get_connection(write=True) as conn:
+                for table, rows in rows_by_table.items():
+                    conn.executemany(QUEUED_WRITES[table], rows)
+            return
+        except Exception:
+            pass
+
+        for table, rows in rows_by_table.items():
+            try:
+                with self.get_connection(write=True) as conn:
+                    conn.executemany(QUEUED_WRITES[table], rows)
+                continue
+            except Exception:
+                pass
+
+            for row in rows:
+                try:
+                    with self.get_connection(write=True) as conn:
+                        conn.execute(QUEUED_WRITES[table], row)
+                except Exception as e:
+                    self.dropped_writes += 1
+                    print(f"Dropped queued {table} row {row!r}: {e}")
+
+    def _insert_many(self, table: str, rows: List[Tuple]):
+        """Insert rows into a queued-write table right away, in one transaction"""
+        if not rows:
+            return
+        # Rows queued earlier go in first, so insertion order follows call order
+        self.flush()
+        # executemany binds each row to the same prepared single-row INSERT, so the
+        # batch never approaches SQLite's per-statement variable limit (999 on older
+        # builds) the way a multi-row VALUES list would, and needs no chunking
+        with self.get_connection(write=True) as conn:
+            conn.executemany(QUEUED_WRITES[table], rows)
+
+    def flush(self):
+        """Block until every queued write has been committed"""
+        if self._write_q.unfinished_tasks:
+            self._write_q.join()
+
+    def close(self):
+        """Flush queued writes, then close the writer and all pooled connections"""
+        self.flush()
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._pool_lock:
+            self._pool_created = 0
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
     def _initialize_database(self):
         """Create database tables if they don't exist"""
-        with self.get_connection() as conn:
+        with self.get_connection(write=True) as conn:
             cursor = conn.cursor()
 
             # Conversations table
@@ -89,12 +511,15 @@ class Database:
                     answer TEXT NOT NULL,
                     category TEXT,
                     keywords TEXT,
+                    keywords_text TEXT,
                     usage_count INTEGER DEFAULT 0,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
 
+            self._migrate_keywords_text(cursor)
+
             # User profiles table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS user_profiles (
@@ -132,11 +557,118 @@ class Database:
                 )
             """)
 
+            # Indexes for the history, metrics and error-log lookups. The timestamp index
+            # also serves ORDER BY timestamp DESC, since SQLite scans B-trees either way
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_msg_conv_ts'")
+            indexes_existed = cursor.fetchone() is not None
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_error_logs_timestamp
+                ON error_logs (timestamp)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_msg_conv_ts
+                ON messages (conversation_id, timestamp)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_analytics_name_ts
+                ON analytics (metric_name, timestamp DESC)
+            """)
+            if not indexes_existed:
+                # Give the planner statistics for the new indexes
+                cursor.execute("ANALYZE")
+
+            for statement in FAQ_REVISION_SCHEMA:
+                cursor.execute(statement)
+
+            self.fts_enabled = self._initialize_faq_search(cursor)
+            self.faq_keywords_enabled = (not self.fts_enabled and
+                                         self._initialize_faq_keyword_table(cursor))
+
             # Insert default FAQs if table is empty
             cursor.execute("SELECT COUNT(*) FROM faqs")
             if cursor.fetchone()[0] == 0:
                 self._insert_default_faqs(cursor)
 
+            # Committed with the schema, so later runs can skip this method
+            cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _load_schema_flags(self):
+        """Detect which FAQ search tables an already-initialized database has"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT name FROM sqlite_master
+                WHERE type = 'table' AND name IN ('faqs_fts', 'faq_keywords')
+            """)
+            tables = {row['name'] for row in cursor.fetchall()}
+        self.fts_enabled = 'faqs_fts' in tables
+        self.faq_keywords_enabled = 'faq_keywords' in tables
+
+    def _migrate_keywords_text(self, cursor):
+        """Add and backfill faqs.keywords_text on databases created before it existed"""
+        cursor.execute("PRAGMA table_info(faqs)")
+        if any(column['name'] == 'keywords_text' for column in cursor.fetchall()):
+            return
+
+        cursor.execute("ALTER TABLE faqs ADD COLUMN keywords_text TEXT")
+        cursor.execute("SELECT id, keywords FROM faqs")
+        cursor.executemany(
+            "UPDATE faqs SET keywords_text = ? WHERE id = ?",
+            [(_keywords_text(_loads(row['keywords'])), row['id']) for row in cursor.fetchall()]
+        )
+
+    def _initialize_faq_search(self, cursor) -> bool:
+        """
+        Create the FTS5 index over FAQ keywords, kept in sync by triggers
+
+        Returns:
+            bool: False if this SQLite build has no FTS5 (keyword search then scans in Python)
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'faqs_fts'")
+        if cursor.fetchone():
+            return True
+
+        cursor.execute("SAVEPOINT faq_search")
+        try:
+            for statement in FAQ_FTS_SCHEMA:
+                cursor.execute(statement)
+            # Index FAQs that existed before the search table did
+            cursor.execute("INSERT INTO faqs_fts (faqs_fts) VALUES ('rebuild')")
+        except sqlite3.OperationalError as e:
+            cursor.execute("ROLLBACK TO faq_search")
+            cursor.execute("RELEASE faq_search")
+            print(f"FTS5 unavailable, FAQ search will scan keywords: {e}")
+            return False
+        cursor.execute("RELEASE faq_search")
+        return True
+
+    def _initialize_faq_keyword_table(self, cursor) -> bool:
+        """
+        Create the per-keyword FAQ table used for keyword search when FTS5 is missing
+
+        Returns:
+            bool: False if this SQLite build has no json1 either (search then scans in Python)
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'faq_keywords'")
+        if cursor.fetchone():
+            return True
+
+        cursor.execute("SAVEPOINT faq_keywords")
+        try:
+            for statement in FAQ_KEYWORD_SCHEMA:
+                cursor.execute(statement)
+            cursor.execute("""
+                INSERT OR IGNORE INTO faq_keywords (faq_id, keyword)
+                SELECT faqs.id, kw.value FROM faqs, json_each(faqs.keywords) AS kw
+            """)
+        except sqlite3.OperationalError as e:
+            cursor.execute("ROLLBACK TO faq_keywords")
+            cursor.execute("RELEASE faq_keywords")
+            print(f"json1 unavailable, FAQ search will scan keywords in Python: {e}")
+            return False
+        cursor.execute("RELEASE faq_keywords")
+        return True
+
     def _insert_default_faqs(self, cursor):
         """Insert default FAQ entries"""
         default_faqs = [
@@ -144,44 +676,45 @@ class Database:
                 'question': 'What are your business hours?',
                 'answer': 'We are available 24/7 to assist you with your queries.',
                 'category': 'general',
-                'keywords': json.dumps(['hours', 'business', 'available', 'open'])
+                'keywords': ['hours', 'business', 'available', 'open']
             },
             {
                 'question': 'How can I track my order?',
                 'answer': 'You can track your order by providing your order number. We will fetch the latest status for you.',
                 'category': 'orders',
-                'keywords': json.dumps(['track', 'order', 'status', 'shipping'])
+                'keywords': ['track', 'order', 'status', 'shipping']
             },
             {
                 'question': 'What is your return policy?',
                 'answer': 'We offer a 30-day return policy on most items. Please contact customer service with your order details.',
                 'category': 'returns',
-                'keywords': json.dumps(['return', 'refund', 'policy', 'exchange'])
+                'keywords': ['return', 'refund', 'policy', 'exchange']
             },
             {
                 'question': 'How do I reset my password?',
                 'answer': 'You can reset your password by clicking the "Forgot Password" link on the login page or contact support.',
                 'category': 'account',
-                'keywords': json.dumps(['password', 'reset', 'account', 'login'])
+                'keywords': ['password', 'reset', 'account', 'login']
             },
             {
                 'question': 'What payment methods do you accept?',
                 'answer': 'We accept credit cards, debit cards, PayPal, and other digital payment methods.',
                 'category': 'payment',
-                'keywords': json.dumps(['payment', 'credit', 'card', 'paypal', 'pay'])
+                'keywords': ['payment', 'credit', 'card', 'paypal', 'pay']
             }
         ]
 
         for faq in default_faqs:
             cursor.execute("""
-                INSERT INTO faqs (question, answer, category, keywords)
-                VALUES (?, ?, ?, ?)
-            """, (faq['question'], faq['answer'], faq['category'], faq['keywords']))
+                INSERT INTO faqs (question, answer, category, keywords, keywords_text)
+                VALUES (?, ?, ?, ?, ?)
+            """, (faq['question'], faq['answer'], faq['category'],
+                  _dumps(faq['keywords']), _keywords_text(faq['keywords'])))
 
     # Conversation Management
     def create_conversation(self, session_id: str, user_id: Optional[str] = None) -> int:
         """Create a new conversation"""
-        with self.get_connection() as conn:
+        with self.get_connection(write=True) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "INSERT INTO conversations (session_id, user_id) VALUES (?, ?)",
@@ -192,206 +725,383 @@ class Database:
     def add_message(self, conversation_id: int, role: str, content: str,
                    intent: Optional[str] = None, confidence: Optional[float] = None,
                    entities: Optional[Dict] = None, response_time: Optional[float] = None):
-        """Add a message to a conversation"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            entities_json = json.dumps(entities) if entities else None
-            cursor.execute("""
-                INSERT INTO messages (conversation_id, role, content, intent, confidence, entities, response_time)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (conversation_id, role, content, intent, confidence, entities_json, response_time))
+        """Add a message to a conversation (written in the background; see flush())"""
+        _check_not_null('messages', conversation_id=conversation_id, role=role, content=content)
+        entities_json = _dumps(entities) if entities else None
+        self._enqueue_write('messages', (conversation_id, role, content, intent, confidence,
+                                         entities_json, response_time, _utc_timestamp()))
+
+    def add_messages(self, messages: List[Tuple[int, str, str, Optional[str], Optional[float],
+                                                Optional[Dict], Optional[float]]]):
+        """
+        Add several messages in a single transaction
+
+        Args:
+            messages: (conversation_id, role, content, intent, confidence, entities,
+                response_time) tuples, in the order they were exchanged
+        """
+        timestamp = _utc_timestamp()
+        self._insert_many('messages', [
+            (conversation_id, role, content, intent, confidence,
+             _dumps(entities) if entities else None, response_time, timestamp)
+            for conversation_id, role, content, intent, confidence, entities, response_time in messages
+        ])
 
     def get_conversation_history(self, conversation_id: int) -> List[Dict]:
         """Get all messages in a conversation"""
+        return list(self.iter_conversation_history(conversation_id))
+
+    def iter_conversation_history(self, conversation_id: int) -> Iterator[Dict]:
+        """Yield the messages in a conversation without materializing the result set"""
+        self.flush()
+        loads = _loads
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            cursor.arraysize = 256
             cursor.execute("""
                 SELECT * FROM messages
                 WHERE conversation_id = ?
                 ORDER BY timestamp ASC
             """, (conversation_id,))
 
-            messages = []
-            for row in cursor.fetchall():
-                messages.append({
+            for row in cursor:
+                yield {
                     'id': row['id'],
                     'role': row['role'],
                     'content': row['content'],
                     'intent': row['intent'],
                     'confidence': row['confidence'],
-                    'entities': json.loads(row['entities']) if row['entities'] else None,
+                    'entities': loads(row['entities']) if row['entities'] else None,
                     'response_time': row['response_time'],
                     'timestamp': row['timestamp']
-                })
-            return messages
+                }
 
     # FAQ Management
     def get_faq_by_keywords(self, keywords: List[str]) -> Optional[Dict]:
-        """Find FAQ matching given keywords"""
+        """Find FAQ matching given keywords, ranked by BM25 over the FAQ keyword index"""
+        # Keywords are split into words (so 'track my order' matches on any of them), each
+        # quoted as an FTS term so punctuation can't act as query syntax
+        words = dict.fromkeys(word for kw in keywords for word in _WORD_RE.findall(kw.lower()))
+        terms = ['"' + word + '"' for word in words]
+        if self.fts_enabled and not terms:
+            return None
+
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM faqs")
 
-            best_match = None
-            best_score = 0
+            if self.fts_enabled:
+                cursor.execute("""
+                    SELECT f.id, f.question, f.answer, f.category, f.usage_count
+                    FROM faqs_fts JOIN faqs f ON f.id = faqs_fts.rowid
+                    WHERE faqs_fts MATCH ?
+                    ORDER BY bm25(faqs_fts)
+                    LIMIT 1
+                """, (' OR '.join(terms),))
+                row = cursor.fetchone()
+                best_match = dict(row) if row else None
+            elif self.faq_keywords_enabled:
+                best_match = self._match_faq_keywords(cursor, keywords)
+            else:
+                best_match = self._scan_faq_keywords(cursor, keywords)
 
-            for row in cursor.fetchall():
-                faq_keywords = json.loads(row['keywords'])
-                score = sum(1 for kw in keywords if any(faq_kw in kw.lower() for faq_kw in faq_keywords))
+        if best_match:
+            # Increment usage count (written in the background, so lookups stay read-only)
+            self.record_faq_usage(best_match['id'])
 
-                if score > best_score:
-                    best_score = score
-                    best_match = {
-                        'id': row['id'],
-                        'question': row['question'],
-                        'answer': row['answer'],
-                        'category': row['category'],
-                        'usage_count': row['usage_count']
-                    }
+        return best_match
 
-            if best_match:
-                # Increment usage count
-                cursor.execute(
-                    "UPDATE faqs SET usage_count = usage_count + 1 WHERE id = ?",
-                    (best_match['id'],)
-                )
-                conn.commit()
+    def _match_faq_keywords(self, cursor, keywords: List[str]) -> Optional[Dict]:
+        """
+        Score FAQs by keyword overlap inside SQLite (used when FTS5 is unavailable)
+
+        Same scoring as _scan_faq_keywords: a query keyword counts once if any stored
+        keyword occurs in it, and ties go to the earliest FAQ.
+        """
+        cursor.execute("""
+            SELECT f.id, f.question, f.answer, f.category, f.usage_count
+            FROM (
+                SELECT k.faq_id, COUNT(DISTINCT q.key) AS score
+                FROM json_each(?) AS q
+                JOIN faq_keywords k ON instr(q.value, k.keyword) > 0
+                GROUP BY k.faq_id
+            ) AS m
+            JOIN faqs f ON f.id = m.faq_id
+            ORDER BY m.score DESC, m.faq_id
+            LIMIT 1
+        """, (_dumps([kw.lower() for kw in keywords]),))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+
+    def _scan_faq_keywords(self, cursor, keywords: List[str]) -> Optional[Dict]:
+        """Score every FAQ in Python by keyword overlap (used without FTS5 and json1)"""
+        cursor.execute("SELECT id, question, answer, category, usage_count, keywords_text FROM faqs")
+
+        keywords = [kw.lower() for kw in keywords]
+        best_match = None
+        best_score = 0
+
+        for row in cursor.fetchall():
+            # Plain string split instead of a JSON parse per FAQ
+            faq_keywords = row['keywords_text'].split(KEYWORD_SEPARATOR) if row['keywords_text'] else ()
+            score = sum(1 for kw in keywords if any(faq_kw in kw for faq_kw in faq_keywords))
+
+            if score > best_score:
+                best_score = score
+                best_match = {
+                    'id': row['id'],
+                    'question': row['question'],
+                    'answer': row['answer'],
+                    'category': row['category'],
+                    'usage_count': row['usage_count']
+                }
 
-            return best_match
+        return best_match
 
     def add_faq(self, question: str, answer: str, category: str, keywords: List[str]):
         """Add a new FAQ"""
-        with self.get_connection() as conn:
+        with self.get_connection(write=True) as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                INSERT INTO faqs (question, answer, category, keywords)
-                VALUES (?, ?, ?, ?)
-            """, (question, answer, category, json.dumps(keywords)))
+                INSERT INTO faqs (question, answer, category, keywords, keywords_text)
+                VALUES (?, ?, ?, ?, ?)
+            """, (question, answer, category, _dumps(keywords), _keywords_text(keywords)))
+        self._invalidate_faqs()
 
-    def get_all_faqs(self) -> List[Dict]:
-        """Get all FAQs"""
+    def get_faq_revision(self) -> int:
+        """
+        Current FAQ content revision, shared by every connection to this database file
+
+        Changes whenever any process adds, removes or edits an FAQ; usage counts don't count.
+        """
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM faqs ORDER BY usage_count DESC")
+            return conn.execute("SELECT revision FROM faq_revision WHERE id = 0").fetchone()[0]
 
-            faqs = []
-            for row in cursor.fetchall():
-                faqs.append({
+    def get_faqs_with_keywords(self) -> List[Dict]:
+        """
+        Get every FAQ's id, answer and keyword list (for building in-memory keyword indexes)
+
+        Returns:
+            List[Dict]: FAQs in id order
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, answer, keywords_text FROM faqs ORDER BY id")
+            return [
+                {
                     'id': row['id'],
-                    'question': row['question'],
                     'answer': row['answer'],
-                    'category': row['category'],
-                    'usage_count': row['usage_count']
-                })
-            return faqs
+                    'keywords': row['keywords_text'].split(KEYWORD_SEPARATOR) if row['keywords_text'] else []
+                }
+                for row in cursor.fetchall()
+            ]
+
+    def record_faq_usage(self, faq_id: int):
+        """Count one use of an FAQ matched outside get_faq_by_keywords (written in the background)"""
+        self._enqueue_write('faqs', (faq_id,))
+
+    def _invalidate_faqs(self):
+        """Drop the cached FAQ list after a write to the faqs table"""
+        with self._cache_lock:
+            self._faqs_version += 1
+            self._faqs_cache = None
+
+    def get_all_faqs(self) -> List[Dict]:
+        """Get all FAQs (served from memory until the next FAQ write)"""
+        # Queued usage counts decide the order
+        self.flush()
+        with self._cache_lock:
+            faqs = self._faqs_cache
+            version = self._faqs_version
+
+        if faqs is None:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT * FROM faqs ORDER BY usage_count DESC")
+
+                faqs = []
+                for row in cursor.fetchall():
+                    faqs.append({
+                        'id': row['id'],
+                        'question': row['question'],
+                        'answer': row['answer'],
+                        'category': row['category'],
+                        'usage_count': row['usage_count']
+                    })
+
+            with self._cache_lock:
+                if self._faqs_version == version:
+                    self._faqs_cache = faqs
+
+        # Copies, so callers can't modify the cached entries
+        return [dict(faq) for faq in faqs]
 
     # User Profile Management
     def create_or_update_user(self, user_id: str, name: Optional[str] = None,
                              email: Optional[str] = None, phone: Optional[str] = None,
                              preferences: Optional[Dict] = None):
         """Create or update user profile"""
-        with self.get_connection() as conn:
+        with self.get_connection(write=True) as conn:
             cursor = conn.cursor()
-            preferences_json = json.dumps(preferences) if preferences else None
+            preferences_json = _dumps(preferences) if preferences else None
 
             cursor.execute("""
                 INSERT INTO user_profiles (user_id, name, email, phone, preferences, last_interaction)
                 VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
                 ON CONFLICT(user_id) DO UPDATE SET
-                    name = COALESCE(?, name),
-                    email = COALESCE(?, email),
-                    phone = COALESCE(?, phone),
-                    preferences = COALESCE(?, preferences),
-                    last_interaction = CURRENT_TIMESTAMP
-            """, (user_id, name, email, phone, preferences_json,
-                  name, email, phone, preferences_json))
+                    name = COALESCE(excluded.name, name),
+                    email = COALESCE(excluded.email, email),
+                    phone = COALESCE(excluded.phone, phone),
+                    preferences = COALESCE(excluded.preferences, preferences),
+                    last_interaction = excluded.last_interaction
+            """, (user_id, name, email, phone, preferences_json))
+
+        with self._cache_lock:
+            self._users_version += 1
+            self._user_cache.pop(user_id, None)
 
     def get_user_profile(self, user_id: str) -> Optional[Dict]:
-        """Get user profile"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM user_profiles WHERE user_id = ?", (user_id,))
-            row = cursor.fetchone()
-
-            if row:
-                return {
-                    'user_id': row['user_id'],
-                    'name': row['name'],
-                    'email': row['email'],
-                    'phone': row['phone'],
-                    'preferences': json.loads(row['preferences']) if row['preferences'] else None,
-                    'created_at': row['created_at'],
-                    'last_interaction': row['last_interaction']
-                }
-            return None
+        """Get user profile (cached until the profile is next written)"""
+        with self._cache_lock:
+            row = self._user_cache.get(user_id)
+            if row is not None:
+                self._user_cache.move_to_end(user_id)
+            version = self._users_version
+
+        if row is None:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT * FROM user_profiles WHERE user_id = ?", (user_id,))
+                row = cursor.fetchone()
+            if row is None:
+                return None
+
+            with self._cache_lock:
+                if self._users_version == version:
+                    self._user_cache[user_id] = row
+                    if len(self._user_cache) > USER_CACHE_SIZE:
+                        self._user_cache.popitem(last=False)
+
+        # Built from the cached row each call, so callers get their own preferences dict
+        return {
+            'user_id': row['user_id'],
+            'name': row['name'],
+            'email': row['email'],
+            'phone': row['phone'],
+            'preferences': _loads(row['preferences']) if row['preferences'] else None,
+            'created_at': row['created_at'],
+            'last_interaction': row['last_interaction']
+        }
 
     # Analytics
     def log_metric(self, metric_name: str, metric_value: float, metadata: Optional[Dict] = None):
-        """Log a metric for analytics"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            metadata_json = json.dumps(metadata) if metadata else None
-            cursor.execute("""
-                INSERT INTO analytics (metric_name, metric_value, metadata)
-                VALUES (?, ?, ?)
-            """, (metric_name, metric_value, metadata_json))
+        """Log a metric for analytics (written in the background; see flush())"""
+        _check_not_null('analytics', metric_name=metric_name, metric_value=metric_value)
+        metadata_json = _dumps(metadata) if metadata else None
+        self._enqueue_write('analytics', (metric_name, metric_value, metadata_json, _utc_timestamp()))
+
+    def log_metrics_batch(self, metrics: List[Tuple[str, float, Optional[Dict], Optional[str]]]):
+        """
+        Log several metrics in a single transaction
+
+        Args:
+            metrics: (metric_name, metric_value, metadata, timestamp) tuples; a None
+                timestamp falls back to the current time
+        """
+        self._insert_many('analytics', [
+            (metric_name, metric_value, _dumps(metadata) if metadata else None, timestamp)
+            for metric_name, metric_value, metadata, timestamp in metrics
+        ])
 
     def get_metrics_summary(self, metric_name: Optional[str] = None,
                            start_date: Optional[str] = None,
                            end_date: Optional[str] = None) -> List[Dict]:
         """Get metrics summary"""
+        self.flush()
         with self.get_connection() as conn:
             cursor = conn.cursor()
 
-            query = "SELECT * FROM analytics WHERE 1=1"
-            params = []
-
-            if metric_name:
-                query += " AND metric_name = ?"
-                params.append(metric_name)
-
-            if start_date:
-                query += " AND timestamp >= ?"
-                params.append(start_date)
-
-            if end_date:
-                query += " AND timestamp <= ?"
-                params.append(end_date)
-
-            query += " ORDER BY timestamp DESC"
-            cursor.execute(query, params)
+            variant = (bool(metric_name), bool(start_date), bool(end_date))
+            params = [value for value in (metric_name, start_date, end_date) if value]
+            cursor.execute(_METRICS_SUMMARY_SQL[variant], params)
 
             metrics = []
             for row in cursor.fetchall():
                 metrics.append({
                     'metric_name': row['metric_name'],
                     'metric_value': row['metric_value'],
-                    'metadata': json.loads(row['metadata']) if row['metadata'] else None,
+                    'metadata': _loads(row['metadata']) if row['metadata'] else None,
                     'timestamp': row['timestamp']
                 })
             return metrics
 
+    def get_metrics_aggregated(self, metric_name: Optional[str] = None,
+                               start_date: Optional[str] = None,
+                               end_date: Optional[str] = None,
+                               bucket: Optional[str] = 'hour') -> List[Dict]:
+        """
+        Get per-metric count/average/min/max, aggregated by SQLite instead of in Python
+
+        Args:
+            metric_name: Only aggregate this metric
+            start_date: Only include metrics at or after this timestamp
+            end_date: Only include metrics at or before this timestamp
+            bucket: 'minute', 'hour' or 'day' to group by time as well, or None for
+                one row per metric over the whole range
+
+        Returns:
+            List[Dict]: Rows ordered by metric name, then bucket
+        """
+        if bucket not in METRIC_BUCKET_FORMATS:
+            raise ValueError(f"Unknown metrics bucket: {bucket}")
+
+        self.flush()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+
+            variant = (bucket, bool(metric_name), bool(start_date), bool(end_date))
+            params = [value for value in (metric_name, start_date, end_date) if value]
+            cursor.execute(_METRICS_AGGREGATED_SQL[variant], params)
+
+            return [dict(row) for row in cursor.fetchall()]
+
     # Error Logging
     def log_error(self, error_type: str, error_message: str,
                  stack_trace: Optional[str] = None, context: Optional[Dict] = None):
-        """Log an error"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            context_json = json.dumps(context) if context else None
-            cursor.execute("""
-                INSERT INTO error_logs (error_type, error_message, stack_trace, context)
-                VALUES (?, ?, ?, ?)
-            """, (error_type, error_message, stack_trace, context_json))
+        """Log an error (written in the background; see flush())"""
+        _check_not_null('error_logs', error_type=error_type, error_message=error_message)
+        context_json = _dumps(context) if context else None
+        self._enqueue_write('error_logs', (error_type, error_message, stack_trace, context_json,
+                                           _utc_timestamp()))
+
+    def log_errors(self, errors: List[Tuple[str, str, Optional[str], Optional[Dict]]]):
+        """
+        Log several errors in a single transaction
+
+        Args:
+            errors: (error_type, error_message, stack_trace, context) tuples
+        """
+        timestamp = _utc_timestamp()
+        self._insert_many('error_logs', [
+            (error_type, error_message, stack_trace, _dumps(context) if context else None, timestamp)
+            for error_type, error_message, stack_trace, context in errors
+        ])
 
-    def get_error_logs(self, limit: int = 100) -> List[Dict]:
-        """Get recent error logs"""
+    def get_error_logs(self, limit: int = 100, since: Optional[str] = None) -> List[Dict]:
+        """
+        Get recent error logs
+
+        Args:
+            limit: Maximum number of logs to return
+            since: Only return logs at or after this timestamp ('YYYY-MM-DD HH:MM:SS')
+        """
+        self.flush()
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT * FROM error_logs
-                ORDER BY timestamp DESC
-                LIMIT ?
-            """, (limit,))
+
+            if since:
+                cursor.execute(_ERROR_LOGS_SINCE_SQL, (since, limit))
+            else:
+                cursor.execute(_ERROR_LOGS_SQL, (limit,))
 
             errors = []
             for row in cursor.fetchall():
@@ -399,7 +1109,7 @@ class Database:
                     'error_type': row['error_type'],
                     'error_message': row['error_message'],
                     'stack_trace': row['stack_trace'],
-                    'context': json.loads(row['context']) if row['context'] else None,
+                    'context': _loads(row['context']) if row['context'] else None,
                     'timestamp': row['timestamp']
                 })
             return errors
@@ -2,14 +2,35 @@
 Intent Recognition module for understanding user queries
 """
 import re
+import numpy as np
 from typing import Dict, List, Tuple
 from config.settings import Config
+from modules.intent_scanner import NUMBA_AVAILABLE
+
+if NUMBA_AVAILABLE:
+    from modules.intent_scanner import scan_intents
+
+# Entity patterns compiled once at import
+_NUMBER_RE = re.compile(r'\b\d+\b')
+_EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+_DATE_RE = re.compile(r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b')
+
+
+def _is_word_boundary(text: str, index: int) -> bool:
+    """Check whether a regex-style word boundary (\\b) falls before text[index]"""
+    before = index > 0 and (text[index - 1].isalnum() or text[index - 1] == '_')
+    after = index < len(text) and (text[index].isalnum() or text[index] == '_')
+    return before != after
 
 
 class IntentRecognizer:
     def __init__(self):
         """Initialize the Intent Recognizer with keyword-based matching"""
         self.intent_keywords = Config.INTENT_KEYWORDS
+        self.intent_automaton = Config.INTENT_AC
+        self.intent_names, self.kw_chars, self.kw_offsets, self.kw_intent_ids = Config.INTENT_KEYWORD_TABLE
+        self.keyword_regex, self.keyword_prefixes = Config.INTENT_KEYWORD_RE
+        self.keywords, self.keyword_intent_matrix = Config.INTENT_KEYWORD_INDEX
         self.context = {}  # Store conversation context
 
     def recognize_intent(self, text: str) -> Tuple[str, float]:
@@ -29,29 +50,87 @@ class IntentRecognizer:
         text_lower = text.lower()
 
         # Score each intent based on keyword matches
-        intent_scores = {}
-        for intent, keywords in self.intent_keywords.items():
-            score = 0
-            for keyword in keywords:
-                if keyword in text_lower:
-                    # Increase score for exact phrase match
-                    score += 1.0
-                    # Bonus for word boundary match
-                    if re.search(r'\b' + re.escape(keyword) + r'\b', text_lower):
-                        score += 0.5
-
-            if score > 0:
-                intent_scores[intent] = score
-
-        # Return intent with highest score
-        if intent_scores:
-            best_intent = max(intent_scores.items(), key=lambda x: x[1])
+        # (the compiled scanner works on bytes, so it only handles ASCII text)
+        if NUMBA_AVAILABLE and text_lower.isascii():
+            intent_scores = self._score_with_scanner(text_lower)
+        elif self.intent_automaton is not None:
+            intent_scores = self._score_with_automaton(text_lower)
+        else:
+            intent_scores = self._score_with_regex(text_lower)
+
+        # Return intent with highest score (argmax takes the first, so ties go by config order)
+        best = int(intent_scores.argmax())
+        best_score = float(intent_scores[best])
+        if best_score > 0:
             # Normalize confidence score
-            confidence = min(best_intent[1] / 3.0, 1.0)
-            return best_intent[0], confidence
+            return self.intent_names[best], min(best_score / 3.0, 1.0)
 
         return 'unknown', 0.0
 
+    def _score_with_scanner(self, text_lower: str) -> np.ndarray:
+        """
+        Score intents with the Numba-compiled keyword scanner
+
+        Args:
+            text_lower (str): Lowercased ASCII user input text
+
+        Returns:
+            np.ndarray: Score per intent, in config order
+        """
+        text_bytes = np.frombuffer(text_lower.encode('ascii'), dtype=np.uint8)
+        scores = scan_intents(text_bytes, self.kw_chars, self.kw_offsets,
+                              self.kw_intent_ids, len(self.intent_names))
+
+        return scores
+
+    def _score_with_automaton(self, text_lower: str) -> np.ndarray:
+        """
+        Score intents with a single Aho-Corasick pass over the text
+
+        Args:
+            text_lower (str): Lowercased user input text
+
+        Returns:
+            np.ndarray: Score per intent, in config order
+        """
+        # Each keyword scores once: 1.5 if any occurrence sits on word boundaries, else 1.0
+        weights = [0.0] * len(self.keywords)
+        for end, (k, length) in self.intent_automaton.iter(text_lower):
+            if weights[k] == 1.5:
+                continue
+            if (_is_word_boundary(text_lower, end - length + 1) and
+                    _is_word_boundary(text_lower, end + 1)):
+                weights[k] = 1.5
+            else:
+                weights[k] = 1.0
+
+        return np.dot(weights, self.keyword_intent_matrix)
+
+    def _score_with_regex(self, text_lower: str) -> np.ndarray:
+        """
+        Score intents with one pass of the combined keyword regex (no pyahocorasick)
+
+        Args:
+            text_lower (str): Lowercased user input text
+
+        Returns:
+            np.ndarray: Score per intent, in config order
+        """
+        # Each keyword scores once: 1.5 if any occurrence sits on word boundaries, else 1.0
+        weights = [0.0] * len(self.keywords)
+        for match in self.keyword_regex.finditer(text_lower):
+            start = match.start()
+            starts_on_boundary = _is_word_boundary(text_lower, start)
+            for k, length in self.keyword_prefixes[match.group(1)]:
+                if weights[k] == 1.5:
+                    continue
+                if starts_on_boundary and _is_word_boundary(text_lower, start + length):
+                    weights[k] = 1.5
+                else:
+                    weights[k] = 1.0
+
+        return np.dot(weights, self.keyword_intent_matrix)
+
     def extract_entities(self, text: str) -> Dict[str, List[str]]:
         """
         Extract entities from text (basic implementation)
@@ -62,27 +141,27 @@ class IntentRecognizer:
         Returns:
             Dict[str, List[str]]: Dictionary of entity types and their values
         """
-        entities = {
-            'numbers': [],
-            'emails': [],
-            'dates': [],
-            'products': []
-        }
+        # Only non-empty entity types are returned. Digits inside dates or emails
+        # also count as numbers, so each type keeps its own pattern, but the email and
+        # date scans only run when their separator characters are present
+        entities = {}
 
         # Extract numbers (potential order IDs, phone numbers)
-        numbers = re.findall(r'\b\d+\b', text)
-        entities['numbers'] = numbers
+        numbers = _NUMBER_RE.findall(text)
+        if numbers:
+            entities['numbers'] = numbers
 
         # Extract email addresses
-        emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
-        entities['emails'] = emails
+        if '@' in text:
+            emails = _EMAIL_RE.findall(text)
+            if emails:
+                entities['emails'] = emails
 
         # Extract dates (simple patterns)
-        dates = re.findall(r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b', text)
-        entities['dates'] = dates
-
-        # Remove empty entity lists
-        entities = {k: v for k, v in entities.items() if v}
+        if '/' in text or '-' in text:
+            dates = _DATE_RE.findall(text)
+            if dates:
+                entities['dates'] = dates
 
         return entities
 
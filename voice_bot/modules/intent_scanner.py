@@ -0,0 +1,72 @@
+"""
+Numba-compiled keyword scanner for intent recognition
+Scans lowercased ASCII text against a flattened keyword table in one compiled pass
+"""
+import numpy as np
+
+# Try to import Numba - it's optional
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(cache=True, nogil=True)
+    def _is_word_char(c):
+        return (48 <= c <= 57) or (65 <= c <= 90) or (97 <= c <= 122) or c == 95
+
+    @njit(cache=True, nogil=True)
+    def _is_word_boundary(text, index):
+        before = index > 0 and _is_word_char(text[index - 1])
+        after = index < len(text) and _is_word_char(text[index])
+        return before != after
+
+    @njit(cache=True, nogil=True)
+    def scan_intents(text, kw_chars, kw_offsets, kw_intent_ids, n_intents):
+        """
+        Score intents for a piece of text
+
+        Each keyword found in the text adds 1.0 to its intent, or 1.5 if any
+        occurrence sits on word boundaries (same scoring as IntentRecognizer).
+
+        Args:
+            text (np.ndarray[uint8]): Lowercased ASCII text
+            kw_chars (np.ndarray[uint8]): All keywords concatenated
+            kw_offsets (np.ndarray[int32]): Start offset of each keyword, plus a final end offset
+            kw_intent_ids (np.ndarray[int32]): Intent index of each keyword
+            n_intents (int): Number of intents
+
+        Returns:
+            np.ndarray[float64]: Score per intent
+        """
+        scores = np.zeros(n_intents, dtype=np.float64)
+        n = len(text)
+
+        for k in range(len(kw_intent_ids)):
+            start = kw_offsets[k]
+            length = kw_offsets[k + 1] - start
+            found = 0
+
+            for i in range(n - length + 1):
+                match = True
+                for j in range(length):
+                    if text[i + j] != kw_chars[start + j]:
+                        match = False
+                        break
+
+                if match:
+                    found = 1
+                    if _is_word_boundary(text, i) and _is_word_boundary(text, i + length):
+                        found = 2
+                        break
+
+            if found == 2:
+                scores[kw_intent_ids[k]] += 1.5
+            elif found == 1:
+                scores[kw_intent_ids[k]] += 1.0
+
+        return scores
+
@@ -2,17 +2,22 @@
 Response Generation module for creating bot responses
 Supports both template-based and AI-powered (OpenAI GPT) response generation
 """
+import asyncio
+import functools
+import importlib.util
+import io
+import json
 import os
 import random
-from typing import Dict, List, Optional
+import re
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from config.settings import Config
 
-# Try to import OpenAI - it's optional
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
+# OpenAI is optional and slow to import, so only check that it is installed here;
+# the client is imported when an AI-backed generator is created
+OPENAI_AVAILABLE = importlib.util.find_spec('openai') is not None
 
 # Try to import database module
 try:
@@ -21,12 +26,112 @@ try:
 except ImportError:
     DATABASE_AVAILABLE = False
 
+# Intents whose responses mention extracted entities
+ENTITY_INTENTS = frozenset({'order_status', 'product_info'})
+
+# Clause appended for the first value of each entity type, in this order
+ENTITY_SUFFIXES = (
+    ('numbers', " I see you mentioned order number {}."),
+    ('emails', " I'll send updates to {}.")
+)
+
+# Entity clause combinations remembered by _entity_suffix
+ENTITY_SUFFIX_CACHE_SIZE = 2048
+
+# Follow-up clause appended when the previous turn had this intent
+CONTEXT_SUFFIXES = {
+    'product_info': " Is there anything specific about the product you'd like to know?"
+}
+
+# Clarification request per type of missing information
+CLARIFICATIONS = {
+    'order_number': "Could you please provide your order number?",
+    'product_name': "Which product are you asking about?",
+    'email': "Could you provide your email address?",
+    'phone': "What's your phone number?",
+    'details': "Could you provide more details about your query?"
+}
+
+
+@functools.lru_cache(maxsize=ENTITY_SUFFIX_CACHE_SIZE)
+def _entity_suffix(*first_values) -> str:
+    """
+    Build the entity clauses for a response (repeat customers repeat their entities)
+
+    Args:
+        *first_values: First extracted value per ENTITY_SUFFIXES entry, None where absent
+
+    Returns:
+        str: The joined clauses, empty if no entity is present
+    """
+    return ''.join(suffix.format(value)
+                   for (_, suffix), value in zip(ENTITY_SUFFIXES, first_values) if value is not None)
+
+
+ERROR_RESPONSES = (
+    "I'm sorry, I'm having trouble processing your request. Could you try again?",
+    "Oops! Something went wrong. Please rephrase your question.",
+    "I apologize, but I didn't catch that. Can you say it again?"
+)
+
+# Sent with every completion request, so kept as short as the instructions allow
+AI_SYSTEM_PROMPT = ("You are a voice customer service assistant. Reply in at most 3 short, "
+                    "friendly, professional sentences, action-oriented where useful, as plain "
+                    "spoken text with no formatting or special characters.")
+
+# Query words looked up in the in-memory FAQ keyword index
+_QUERY_TOKEN_RE = re.compile(r'\w+')
+
+# Query words too common to identify an FAQ; dropped before any keyword lookup
+_FAQ_STOPWORDS = frozenset({
+    'a', 'about', 'am', 'an', 'and', 'are', 'at', 'be', 'can', 'could', 'do', 'does',
+    'for', 'have', 'how', 'i', 'in', 'is', 'it', 'me', 'my', 'of', 'on', 'or', 'please',
+    'so', 'the', 'there', 'this', 'to', 'was', 'what', 'when', 'where', 'which', 'why',
+    'will', 'with', 'would', 'you', 'your'
+})
+
+# FAQ lookups remembered per normalized query (misses included)
+FAQ_CACHE_SIZE = 1024
+
+# Whitespace after sentence-ending punctuation, where streamed text is cut for TTS
+_SENTENCE_BREAK_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Splits a batched completion into its numbered answers ("1. ...", "2. ...")
+_NUMBERED_ANSWER_RE = re.compile(r'^\s*(\d+)\.\s*', re.MULTILINE)
+
+
+def split_sentences(text_chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Regroup streamed text into whole sentences
+
+    Args:
+        text_chunks (Iterable[str]): Successive pieces of text (e.g. streamed tokens)
+
+    Yields:
+        str: Each complete sentence, then any trailing text once the stream ends
+    """
+    buffer = ''
+    for chunk in text_chunks:
+        buffer += chunk
+        *sentences, buffer = _SENTENCE_BREAK_RE.split(buffer)
+        for sentence in sentences:
+            if sentence:
+                yield sentence
+
+    buffer = buffer.strip()
+    if buffer:
+        yield buffer
+
 
 class ResponseGenerator:
     def __init__(self):
         """Initialize the Response Generator with template-based responses"""
         self.response_templates = Config.RESPONSE_TEMPLATES
-        self.conversation_history = []
+        self._unknown_templates = self.response_templates['unknown']
+        self.conversation_history = deque(maxlen=Config.HISTORY_MAX)
+        # Per-instance generator, with its bound choice() looked up once
+        self._rng = random.Random()
+        self._choose = self._rng.choice
 
     def generate_response(self, intent: str, entities: Dict = None, context: Dict = None) -> str:
         """
@@ -41,13 +146,13 @@ class ResponseGenerator:
             str: Generated response
         """
         # Get response templates for the intent
-        templates = self.response_templates.get(intent, self.response_templates['unknown'])
+        templates = self.response_templates.get(intent, self._unknown_templates)
 
         # Select a random template to add variety
-        base_response = random.choice(templates)
+        base_response = self._choose(templates)
 
         # Enhance response with entity information if available
-        if entities and intent in ['order_status', 'product_info']:
+        if entities and intent in ENTITY_INTENTS:
             base_response = self._enhance_with_entities(base_response, entities)
 
         # Add context-aware enhancements if needed
@@ -73,16 +178,11 @@ class ResponseGenerator:
         Returns:
             str: Enhanced response
         """
-        # Add order number if available
-        if 'numbers' in entities and entities['numbers']:
-            order_num = entities['numbers'][0]
-            response += f" I see you mentioned order number {order_num}."
-
-        # Add email if available
-        if 'emails' in entities and entities['emails']:
-            email = entities['emails'][0]
-            response += f" I'll send updates to {email}."
-
+        # Add the first order number / email if available
+        suffix = _entity_suffix(*[values[0] if (values := entities.get(entity_type)) else None
+                                  for entity_type, _ in ENTITY_SUFFIXES])
+        if suffix:
+            return response + suffix
         return response
 
     def _add_context_awareness(self, response: str, context: Dict) -> str:
@@ -96,12 +196,10 @@ class ResponseGenerator:
         Returns:
             str: Context-enhanced response
         """
-        # Check if this is a follow-up query
-        if context.get('last_intent') and len(self.conversation_history) > 0:
-            # Add continuity to conversation
-            last_intent = context.get('last_intent')
-            if last_intent == 'product_info':
-                response += " Is there anything specific about the product you'd like to know?"
+        # Add continuity to conversation if this is a follow-up query
+        suffix = CONTEXT_SUFFIXES.get(context.get('last_intent'))
+        if suffix and self.conversation_history:
+            return response + suffix
 
         return response
 
@@ -115,15 +213,7 @@ class ResponseGenerator:
         Returns:
             str: Clarification request
         """
-        clarifications = {
-            'order_number': "Could you please provide your order number?",
-            'product_name': "Which product are you asking about?",
-            'email': "Could you provide your email address?",
-            'phone': "What's your phone number?",
-            'details': "Could you provide more details about your query?"
-        }
-
-        return clarifications.get(missing_info, "Could you provide more information?")
+        return CLARIFICATIONS.get(missing_info, "Could you provide more information?")
 
     def generate_error_response(self) -> str:
         """
@@ -132,26 +222,20 @@ class ResponseGenerator:
         Returns:
             str: Error response
         """
-        error_responses = [
-            "I'm sorry, I'm having trouble processing your request. Could you try again?",
-            "Oops! Something went wrong. Please rephrase your question.",
-            "I apologize, but I didn't catch that. Can you say it again?"
-        ]
-
-        return random.choice(error_responses)
+        return self._choose(ERROR_RESPONSES)
 
     def get_conversation_history(self) -> List[Dict]:
         """
         Get conversation history
 
         Returns:
-            List[Dict]: Conversation history
+            List[Dict]: Conversation history (the most recent Config.HISTORY_MAX responses)
         """
-        return self.conversation_history
+        return list(self.conversation_history)
 
     def clear_history(self):
         """Clear conversation history"""
-        self.conversation_history = []
+        self.conversation_history.clear()
 
 
 class AdvancedResponseGenerator(ResponseGenerator):
@@ -173,6 +257,16 @@ class AdvancedResponseGenerator(ResponseGenerator):
         self.use_ai_model = use_ai_model and OPENAI_AVAILABLE
         self.database = database
 
+        # Keyword -> FAQ ids, plus each FAQ's answer; built lazily by reload_faq_index()
+        self._faq_index: Dict[str, Set[int]] = {}
+        self._faq_answers: Dict[int, str] = {}
+        self._faq_revision = None
+
+        # Sorted unique query tokens -> (faq_id, answer), or None for no match; only holds
+        # results for the current FAQ revision (see reload_faq_index)
+        self._faq_cache = OrderedDict()
+        self._faq_cache_lock = threading.Lock()
+
         # Initialize OpenAI client if requested and available
         self.ai_client = None
         if self.use_ai_model:
@@ -181,6 +275,7 @@ class AdvancedResponseGenerator(ResponseGenerator):
 
             if api_key:
                 try:
+                    from openai import OpenAI
                     self.ai_client = OpenAI(api_key=api_key)
                     print("OpenAI client initialized successfully")
                 except Exception as e:
@@ -220,6 +315,94 @@ class AdvancedResponseGenerator(ResponseGenerator):
         # Fall back to template-based generation
         return super().generate_response(intent, entities, context)
 
+    def generate_response_sentences(self, intent: str, entities: Dict = None, context: Dict = None,
+                                    user_query: str = None) -> Iterator[str]:
+        """
+        Generate a response like generate_response, yielding it a sentence at a time
+
+        AI responses are streamed, so the first sentence can be handed to TTS
+        (TextToSpeech.synthesize_sentences) before the rest has been generated.
+
+        Args:
+            intent (str): Recognized intent
+            entities (Dict, optional): Extracted entities
+            context (Dict, optional): Conversation context
+            user_query (str, optional): Original user query for AI generation
+
+        Yields:
+            str: Successive sentences of the response (FAQ and template responses
+                are yielded whole)
+        """
+        # Try FAQ lookup first if database is available
+        if self.database and user_query:
+            faq_response = self._check_faq(user_query)
+            if faq_response:
+                yield faq_response
+                return
+
+        # Use AI if enabled and user query is available
+        if self.use_ai_model and self.ai_client and user_query:
+            yield from self.generate_response_ai_sentences(intent, user_query, entities, context)
+            return
+
+        # Fall back to template-based generation
+        yield super().generate_response(intent, entities, context)
+
+    def reload_faq_index(self):
+        """Rebuild the in-memory FAQ keyword index from the database"""
+        index = {}
+        answers = {}
+        revision = self.database.get_faq_revision()
+        for faq in self.database.get_faqs_with_keywords():
+            answers[faq['id']] = faq['answer']
+            for keyword in faq['keywords']:
+                index.setdefault(keyword.strip().lower(), set()).add(faq['id'])
+
+        with self._faq_cache_lock:
+            self._faq_index = index
+            self._faq_answers = answers
+            self._faq_revision = revision
+            self._faq_cache.clear()
+
+    def _match_faq_index(self, tokens: Tuple[str, ...]) -> Optional[int]:
+        """
+        Find the FAQ sharing the most keywords with the query, using the in-memory index
+
+        Args:
+            tokens (Tuple[str, ...]): Unique lowercased query words
+
+        Returns:
+            int: FAQ id (ties go to the earliest FAQ), or None if no keyword matches exactly
+        """
+        hits = [self._faq_index[token] for token in tokens if token in self._faq_index]
+        if not hits:
+            return None
+
+        overlap = {}
+        for faq_ids in hits:
+            for faq_id in faq_ids:
+                overlap[faq_id] = overlap.get(faq_id, 0) + 1
+        return min(overlap, key=lambda faq_id: (-overlap[faq_id], faq_id))
+
+    async def generate_response_async(self, intent: str, entities: Dict = None, context: Dict = None,
+                                      user_query: str = None) -> str:
+        """
+        Generate a response without blocking the event loop on FAQ or OpenAI calls
+
+        Args:
+            intent (str): Recognized intent
+            entities (Dict, optional): Extracted entities
+            context (Dict, optional): Conversation context
+            user_query (str, optional): Original user query for AI generation
+
+        Returns:
+            str: Generated response
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(
+            self.generate_response, intent, entities, context, user_query=user_query
+        ))
+
     def _check_faq(self, user_query: str) -> Optional[str]:
         """
         Check if user query matches any FAQ
@@ -234,12 +417,46 @@ class AdvancedResponseGenerator(ResponseGenerator):
             return None
 
         try:
-            # Extract keywords from query
-            keywords = user_query.lower().split()
-            faq = self.database.get_faq_by_keywords(keywords)
-
-            if faq:
-                return faq['answer']
+            if self._faq_revision != self.database.get_faq_revision():
+                self.reload_faq_index()
+            # Results (misses included) are only valid for the revision they were computed at
+            revision = self._faq_revision
+
+            # Word order, repeats, punctuation and stopwords don't change the match, so
+            # "track my order?" and "order track" share one cache entry
+            tokens = tuple(sorted(set(_QUERY_TOKEN_RE.findall(user_query.lower())) - _FAQ_STOPWORDS))
+            if not tokens:
+                return None
+
+            with self._faq_cache_lock:
+                cached = self._faq_cache.get(tokens, False)
+                if cached is not False:
+                    self._faq_cache.move_to_end(tokens)
+
+            if cached is False:
+                # Exact keyword hits are answered from the in-memory index
+                faq_id = self._match_faq_index(tokens)
+                if faq_id is not None:
+                    self.database.record_faq_usage(faq_id)
+                    cached = (faq_id, self._faq_answers[faq_id])
+                else:
+                    # Otherwise let the database's stemmed keyword search have a go
+                    faq = self.database.get_faq_by_keywords(list(tokens))
+                    cached = (faq['id'], faq['answer']) if faq else None
+
+                with self._faq_cache_lock:
+                    # Skip the store if a reload cleared the cache meanwhile, so a stale
+                    # "no FAQ" can't outlive the revision that added a match
+                    if self._faq_revision == revision:
+                        self._faq_cache[tokens] = cached
+                        while len(self._faq_cache) > FAQ_CACHE_SIZE:
+                            self._faq_cache.popitem(last=False)
+
+            elif cached is not None:
+                self.database.record_faq_usage(cached[0])
+
+            if cached is not None:
+                return cached[1]
         except Exception as e:
             print(f"FAQ lookup failed: {e}")
 
@@ -262,55 +479,271 @@ class AdvancedResponseGenerator(ResponseGenerator):
         if not self.ai_client:
             return self.generate_response(intent, entities, context)
 
-        # Build context for AI
-        system_prompt = """You are a helpful customer service assistant for a voice bot system.
-Your responses should be:
-- Concise and clear (2-3 sentences maximum)
-- Friendly and professional
-- Action-oriented when appropriate
-- Natural for speech synthesis
+        try:
+            # Call OpenAI API
+            response = self.ai_client.chat.completions.create(
+                **self._chat_request_body(intent, user_query, entities, context)
+            )
+
+            ai_response = response.choices[0].message.content.strip()
 
-Do not use special characters or formatting that would sound awkward when spoken."""
+            # Store in conversation history
+            self.conversation_history.append({
+                'intent': intent,
+                'response': ai_response,
+                'method': 'ai'
+            })
 
-        # Build user prompt with context
-        user_prompt = f"User query: {user_query}\n"
-        user_prompt += f"Detected intent: {intent}\n"
+            return ai_response
+
+        except Exception as e:
+            print(f"OpenAI API error: {e}")
+            # Fall back to template-based response
+            return super().generate_response(intent, entities, context)
+
+    def generate_response_ai_stream(self, intent: str, user_query: str,
+                                    entities: Dict = None, context: Dict = None) -> Iterator[str]:
+        """
+        Generate a response using an AI model, yielding text as it is produced
+
+        Args:
+            intent (str): Recognized intent
+            user_query (str): Original user query
+            entities (Dict, optional): Extracted entities
+            context (Dict, optional): Conversation context
+
+        Yields:
+            str: Successive pieces of the response (the template response as a single
+                piece if the AI model is unavailable or fails before answering)
+        """
+        if not self.ai_client:
+            yield self.generate_response(intent, entities, context)
+            return
+
+        pieces = []
+        try:
+            stream = self.ai_client.chat.completions.create(
+                stream=True, **self._chat_request_body(intent, user_query, entities, context)
+            )
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    pieces.append(delta)
+                    yield delta
+
+        except Exception as e:
+            print(f"OpenAI API error: {e}")
+            if not pieces:
+                # Fall back to template-based response
+                yield super().generate_response(intent, entities, context)
+                return
+
+        # Store in conversation history
+        self.conversation_history.append({
+            'intent': intent,
+            'response': ''.join(pieces).strip(),
+            'method': 'ai'
+        })
+
+    def generate_response_ai_sentences(self, intent: str, user_query: str,
+                                       entities: Dict = None, context: Dict = None) -> Iterator[str]:
+        """
+        Stream an AI response as complete sentences, ready for TextToSpeech.stream_synthesize
+
+        Example:
+            audio = tts.stream_synthesize(generator.generate_response_ai_sentences(intent, query))
+            player.play_audio_stream(audio)
+
+        Args:
+            intent (str): Recognized intent
+            user_query (str): Original user query
+            entities (Dict, optional): Extracted entities
+            context (Dict, optional): Conversation context
+
+        Yields:
+            str: Each sentence of the response as soon as it is complete
+        """
+        return split_sentences(self.generate_response_ai_stream(intent, user_query, entities, context))
+
+    def _chat_request_body(self, intent: str, user_query: str,
+                           entities: Dict = None, context: Dict = None) -> Dict:
+        """Chat completion parameters for answering a single query"""
+        # Build user prompt with context (the system prompt already says how to reply)
+        user_prompt = self._describe_query(intent, user_query, entities, context)
+
+        return {
+            'model': "gpt-3.5-turbo",
+            'messages': [
+                {"role": "system", "content": AI_SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt}
+            ],
+            'max_tokens': 150,
+            'temperature': 0.7
+        }
+
+    def _describe_query(self, intent: str, user_query: str,
+                        entities: Dict = None, context: Dict = None) -> str:
+        """Describe a query and what was recognized about it for the model prompt"""
+        description = f"User query: {user_query}\n"
+        description += f"Detected intent: {intent}\n"
 
         if entities:
-            user_prompt += f"Extracted entities: {entities}\n"
+            description += f"Extracted entities: {entities}\n"
 
         if context and context.get('last_intent'):
-            user_prompt += f"Previous intent: {context.get('last_intent')}\n"
+            description += f"Previous intent: {context.get('last_intent')}\n"
 
-        user_prompt += "\nGenerate a helpful, natural-sounding response:"
+        return description
+
+    def generate_responses_ai_batch(self, queries: List[Tuple[str, str, Dict, Dict]]) -> List[str]:
+        """
+        Generate responses for several queries with a single OpenAI request
+
+        Args:
+            queries (List[Tuple]): (intent, user_query, entities, context) per query
+
+        Returns:
+            List[str]: Response per query, in input order. Answers missing from the
+                batched completion are requested individually.
+        """
+        if not queries:
+            return []
+
+        if not self.ai_client:
+            return [self.generate_response(intent, entities, context)
+                    for intent, _, entities, context in queries]
+
+        user_prompt = (
+            f"Answer each of the following {len(queries)} customer queries independently.\n"
+            f"Reply with exactly {len(queries)} answers numbered 1 to {len(queries)}, each on "
+            "its own line starting with its number and a period (for example '1. ...'), "
+            "and nothing else.\n"
+        )
+        for number, (intent, user_query, entities, context) in enumerate(queries, 1):
+            user_prompt += f"\n{number}.\n" + self._describe_query(intent, user_query, entities, context)
 
         try:
-            # Call OpenAI API
             response = self.ai_client.chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": AI_SYSTEM_PROMPT},
                     {"role": "user", "content": user_prompt}
                 ],
-                max_tokens=150,
+                max_tokens=150 * len(queries),
                 temperature=0.7
             )
+            content = response.choices[0].message.content or ''
+        except Exception as e:
+            print(f"OpenAI API error: {e}")
+            # Fall back to template-based responses
+            return [super(AdvancedResponseGenerator, self).generate_response(intent, entities, context)
+                    for intent, _, entities, context in queries]
+
+        # re.split yields [preamble, number, answer, number, answer, ...]
+        parts = _NUMBERED_ANSWER_RE.split(content)
+        answers = {}
+        for number, answer in zip(parts[1::2], parts[2::2]):
+            answer = answer.strip()
+            if answer:
+                answers.setdefault(int(number), answer)
+
+        responses = []
+        for number, (intent, user_query, entities, context) in enumerate(queries, 1):
+            ai_response = answers.get(number)
+            if ai_response is None:
+                responses.append(self.generate_response_ai(intent, user_query, entities, context))
+                continue
 
-            ai_response = response.choices[0].message.content.strip()
-
-            # Store in conversation history
             self.conversation_history.append({
                 'intent': intent,
                 'response': ai_response,
                 'method': 'ai'
             })
+            responses.append(ai_response)
 
-            return ai_response
+        return responses
+
+    def submit_batch(self, queries: List[Tuple[str, str, Dict, Dict]]) -> Optional[str]:
+        """
+        Submit queries to the OpenAI Batch API for offline answering (e.g. FAQ pre-generation)
+
+        Batch requests are billed at half the synchronous price and finish within 24 hours.
+
+        Args:
+            queries (List[Tuple]): (intent, user_query, entities, context) per query
+
+        Returns:
+            str: Batch id to pass to poll_batch(), or None if submission failed
+        """
+        if not self.ai_client or not queries:
+            return None
+
+        # One request per line; custom_id is the query's position in the input
+        lines = [
+            json.dumps({
+                'custom_id': str(index),
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': self._chat_request_body(intent, user_query, entities, context)
+            })
+            for index, (intent, user_query, entities, context) in enumerate(queries)
+        ]
 
+        try:
+            input_file = self.ai_client.files.create(
+                file=('batch_input.jsonl', io.BytesIO('\n'.join(lines).encode('utf-8'))),
+                purpose='batch'
+            )
+            batch = self.ai_client.batches.create(
+                input_file_id=input_file.id,
+                endpoint='/v1/chat/completions',
+                completion_window='24h'
+            )
+            return batch.id
         except Exception as e:
-            print(f"OpenAI API error: {e}")
-            # Fall back to template-based response
-            return super().generate_response(intent, entities, context)
+            print(f"OpenAI batch submission failed: {e}")
+            return None
+
+    def poll_batch(self, batch_id: str) -> Optional[Dict[int, Optional[str]]]:
+        """
+        Collect the answers of a batch submitted with submit_batch()
+
+        Args:
+            batch_id (str): Batch id returned by submit_batch()
+
+        Returns:
+            Dict[int, str]: Answer per query index (None where that request failed),
+                or None while the batch is still running or if it did not complete
+        """
+        if not self.ai_client:
+            return None
+
+        try:
+            batch = self.ai_client.batches.retrieve(batch_id)
+            if batch.status != 'completed':
+                if batch.status in ('failed', 'expired', 'cancelled'):
+                    print(f"OpenAI batch {batch_id} ended with status '{batch.status}'")
+                return None
+
+            answers = {}
+            if batch.output_file_id:
+                output = self.ai_client.files.content(batch.output_file_id).text
+                for line in output.splitlines():
+                    if not line.strip():
+                        continue
+                    result = json.loads(line)
+                    response = result.get('response') or {}
+                    answer = None
+                    if response.get('status_code') == 200:
+                        answer = response['body']['choices'][0]['message']['content'].strip()
+                    answers[int(result['custom_id'])] = answer
+            return answers
+
+        except Exception as e:
+            print(f"OpenAI batch retrieval failed: {e}")
+            return None
 
 
 if __name__ == "__main__":
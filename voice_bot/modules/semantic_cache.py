@@ -0,0 +1,147 @@
+"""
+Semantic response cache keyed on sentence embeddings of user utterances
+Near-duplicate queries reuse a previously generated response instead of re-running the pipeline
+"""
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+# Try to import sentence-transformers - it's optional
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+# Try to import FAISS - it's optional
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
+
+class SemanticCache:
+    """
+    Stores responses alongside unit-normalized utterance embeddings and looks up
+    the most similar previous utterance by cosine similarity
+    """
+
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', threshold: float = 0.9,
+                 max_entries: int = 10000, faiss_min_entries: int = 1000):
+        """
+        Initialize the semantic cache
+
+        Args:
+            model_name: sentence-transformers model used to embed utterances
+            threshold: Minimum cosine similarity for a cache hit
+            max_entries: Maximum number of cached responses; past it the oldest tenth is
+                evicted (FIFO), in one go so the FAISS index is rebuilt rarely
+            faiss_min_entries: Switch lookups to a FAISS index past this many entries
+        """
+        if not SENTENCE_TRANSFORMERS_AVAILABLE:
+            raise ImportError("sentence-transformers is required for SemanticCache")
+
+        self.model = SentenceTransformer(model_name)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.faiss_min_entries = faiss_min_entries
+
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        self.embeddings = np.empty((0, self.dimension), dtype=np.float32)
+        self.entries = []
+        self.index = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalize an utterance before embedding"""
+        return ' '.join(text.lower().split())
+
+    def encode(self, text: str) -> np.ndarray:
+        """Embed an utterance as a unit-length float32 vector (shape (1, dimension))"""
+        embedding = self.model.encode([self.normalize(text)], normalize_embeddings=True)
+        return np.asarray(embedding, dtype=np.float32)
+
+    def lookup(self, text: str, embedding: Optional[np.ndarray] = None) -> Optional[Dict]:
+        """
+        Find the cached response for the most similar previous utterance
+
+        Args:
+            text: User utterance
+            embedding: encode(text), if already computed
+
+        Returns:
+            Dict: Cached response entry, or None on a miss
+        """
+        query = self.encode(text) if embedding is None else embedding
+
+        with self._lock:
+            count = len(self.entries)
+            if count == 0:
+                return None
+
+            if self.index is not None:
+                sims, ids = self.index.search(query, 1)
+                best_sim, best_idx = float(sims[0][0]), int(ids[0][0])
+            else:
+                sims = self.embeddings[:count] @ query[0]
+                best_idx = int(sims.argmax())
+                best_sim = float(sims[best_idx])
+
+            if best_sim >= self.threshold:
+                return self.entries[best_idx]
+
+        return None
+
+    def insert(self, text: str, entry: Dict, embedding: Optional[np.ndarray] = None):
+        """
+        Cache a response for an utterance
+
+        Args:
+            text: User utterance
+            entry: Response data to return on future hits
+            embedding: encode(text), if already computed (e.g. for the lookup that missed)
+        """
+        if embedding is None:
+            embedding = self.encode(text)
+
+        with self._lock:
+            if len(self.entries) >= self.max_entries:
+                self._evict_oldest(max(1, self.max_entries // 10))
+            count = len(self.entries)
+
+            # Grow the embedding matrix geometrically instead of on every insert
+            if count == len(self.embeddings):
+                grown = np.empty((max(2 * count, 64), self.dimension), dtype=np.float32)
+                grown[:count] = self.embeddings[:count]
+                self.embeddings = grown
+
+            self.embeddings[count] = embedding[0]
+            self.entries.append(entry)
+
+            if self.index is not None:
+                self.index.add(embedding)
+            elif FAISS_AVAILABLE and count + 1 >= self.faiss_min_entries:
+                self.index = faiss.IndexFlatIP(self.dimension)
+                self.index.add(self.embeddings[:count + 1])
+
+    def _evict_oldest(self, n: int):
+        """Drop the n oldest entries and rebuild the FAISS index over the rest (lock held)"""
+        count = len(self.entries)
+        kept = count - n
+        self.embeddings[:kept] = self.embeddings[n:count]
+        del self.entries[:n]
+
+        self.index = None
+        if FAISS_AVAILABLE and kept >= self.faiss_min_entries:
+            self.index = faiss.IndexFlatIP(self.dimension)
+            self.index.add(self.embeddings[:kept])
+
+    def clear(self):
+        """Remove all cached responses"""
+        with self._lock:
+            self.embeddings = np.empty((0, self.dimension), dtype=np.float32)
+            self.entries = []
+            self.index = None
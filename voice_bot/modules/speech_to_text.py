@@ -1,12 +1,51 @@
 """
 Speech-to-Text module using Google Cloud Speech-to-Text API
 """
+import asyncio
 import io
+import mmap
 import os
-from google.cloud import speech
-from google.cloud.speech import RecognitionConfig, RecognitionAudio
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from config.settings import Config
 
+# Try to import diskcache - it's optional
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
+# Unary recognize rejects audio over one minute; longer audio needs long_running_recognize
+UNARY_MAX_SECONDS = 55
+# In transcribe_audio_files, files shorter than this skip the long-running operation overhead
+BATCH_UNARY_SECONDS = 15
+# Seconds to wait for a long_running_recognize operation to finish
+LONG_RUNNING_TIMEOUT = 600
+
+# One client (and so one gRPC channel) per process, shared by every SpeechToText
+_client = None
+_client_lock = threading.Lock()
+
+
+def _get_client():
+    """Create the process-wide SpeechClient on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from google.cloud import speech
+                from google.cloud.speech_v1.services.speech.transports import SpeechGrpcTransport
+                # One keepalive-tuned channel that every concurrent request multiplexes over
+                channel = SpeechGrpcTransport.create_channel(
+                    'speech.googleapis.com:443', options=list(Config.GRPC_CHANNEL_OPTIONS)
+                )
+                _client = speech.SpeechClient(
+                    transport=SpeechGrpcTransport(channel=channel)
+                )
+    return _client
+
 
 class SpeechToText:
     def __init__(self):
@@ -15,14 +54,103 @@ class SpeechToText:
         if Config.GOOGLE_APPLICATION_CREDENTIALS:
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = Config.GOOGLE_APPLICATION_CREDENTIALS
 
-        self.client = speech.SpeechClient()
-        self.config = RecognitionConfig(
-            encoding=RecognitionConfig.AudioEncoding.LINEAR16,
+        # Imported here rather than at module level: the generated protobuf code takes
+        # a fifth of a second to load, which callers that never transcribe shouldn't pay
+        from google.cloud import speech
+        self._speech = speech
+
+        self.client = _get_client()
+        self.config = speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
             sample_rate_hertz=Config.SAMPLE_RATE,
             language_code=Config.LANGUAGE_CODE,
             enable_automatic_punctuation=True,
         )
 
+        # Transcripts survive restarts, keyed by a hash of the audio and recognition settings
+        self.disk_cache = None
+        if DISKCACHE_AVAILABLE and Config.SPEECH_CACHE_DIR:
+            try:
+                self.disk_cache = diskcache.Cache(os.path.join(Config.SPEECH_CACHE_DIR, 'stt'))
+            except Exception as e:
+                print(f"Transcript cache unavailable: {str(e)}")
+
+    def _transcript_key(self, content):
+        """
+        Disk cache key for a piece of audio under the current recognition settings
+
+        Args:
+            content (bytes): Raw audio data
+
+        Returns:
+            str: Cache key, or None if the disk cache is disabled
+        """
+        if self.disk_cache is None:
+            return None
+        digest = hashlib.sha256(
+            f"{self.config.language_code}\0{self.config.sample_rate_hertz}\0".encode('utf-8')
+        )
+        digest.update(content)
+        return digest.hexdigest()
+
+    def _store_transcript(self, key, response):
+        """
+        Join the transcripts of a recognition response and persist them
+
+        Args:
+            key (str): Cache key from _transcript_key (None to skip caching)
+            response: RecognizeResponse or LongRunningRecognizeResponse
+
+        Returns:
+            str: Transcribed text
+        """
+        # Combine all transcripts
+        transcripts = []
+        for result in response.results:
+            transcripts.append(result.alternatives[0].transcript)
+        transcript = ' '.join(transcripts)
+
+        if key is not None:
+            self.disk_cache.set(key, transcript, expire=Config.SPEECH_CACHE_TTL)
+        return transcript
+
+    @staticmethod
+    def _audio_seconds(content):
+        """Approximate duration of 16-bit PCM audio from its size"""
+        return len(content) / (2 * Config.SAMPLE_RATE * Config.AUDIO_CHANNELS)
+
+    def _start_long_running(self, content):
+        """Submit audio to long_running_recognize and return the pending operation"""
+        audio = self._speech.RecognitionAudio(content=bytes(content))
+        return self.client.long_running_recognize(config=self.config, audio=audio)
+
+    def _recognize(self, content):
+        """
+        Transcribe raw audio content, reusing a persisted transcript of identical audio
+
+        Audio longer than the unary limit goes through long_running_recognize.
+
+        Args:
+            content (bytes | mmap.mmap): Raw audio data; a mapping is only copied into
+                bytes when a request is actually sent
+
+        Returns:
+            str: Transcribed text (API errors propagate to the caller)
+        """
+        key = self._transcript_key(content)
+        if key is not None:
+            transcript = self.disk_cache.get(key)
+            if transcript is not None:
+                return transcript
+
+        if self._audio_seconds(content) > UNARY_MAX_SECONDS:
+            response = self._start_long_running(content).result(timeout=LONG_RUNNING_TIMEOUT)
+        else:
+            audio = self._speech.RecognitionAudio(content=bytes(content))
+            response = self.client.recognize(config=self.config, audio=audio)
+
+        return self._store_transcript(key, response)
+
     def transcribe_audio_file(self, audio_file_path):
         """
         Transcribe audio from a file
@@ -35,17 +163,12 @@ class SpeechToText:
         """
         try:
             with io.open(audio_file_path, 'rb') as audio_file:
-                content = audio_file.read()
-
-            audio = RecognitionAudio(content=content)
-            response = self.client.recognize(config=self.config, audio=audio)
-
-            # Combine all transcripts
-            transcripts = []
-            for result in response.results:
-                transcripts.append(result.alternatives[0].transcript)
-
-            return ' '.join(transcripts)
+                # mmap cannot map an empty file
+                if os.fstat(audio_file.fileno()).st_size == 0:
+                    return self._recognize(b'')
+                # Hash and size the mapped pages directly; cache hits never copy the file
+                with mmap.mmap(audio_file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                    return self._recognize(content)
 
         except Exception as e:
             print(f"Error in transcription: {str(e)}")
@@ -62,20 +185,144 @@ class SpeechToText:
             str: Transcribed text
         """
         try:
-            audio = RecognitionAudio(content=audio_content)
-            response = self.client.recognize(config=self.config, audio=audio)
-
-            # Combine all transcripts
-            transcripts = []
-            for result in response.results:
-                transcripts.append(result.alternatives[0].transcript)
-
-            return ' '.join(transcripts)
+            return self._recognize(audio_content)
 
         except Exception as e:
             print(f"Error in transcription: {str(e)}")
             return None
 
+    def transcribe_batch(self, audio_contents, executor=None):
+        """
+        Transcribe several pieces of raw audio concurrently
+
+        Args:
+            audio_contents (List[bytes]): Raw audio data, one entry per request
+            executor (Executor, optional): Shared executor to run the requests on.
+                A temporary thread pool is used if not given.
+
+        Returns:
+            List[str]: Transcribed text per entry, in input order (None where transcription failed)
+        """
+        if not audio_contents:
+            return []
+
+        if executor is not None:
+            return list(executor.map(self.transcribe_audio_stream, audio_contents))
+
+        with ThreadPoolExecutor(max_workers=len(audio_contents)) as temporary_executor:
+            return list(temporary_executor.map(self.transcribe_audio_stream, audio_contents))
+
+    def transcribe_audio_files(self, audio_file_paths):
+        """
+        Transcribe several audio files, sending long ones to long_running_recognize
+
+        All long-running operations are submitted before any is awaited, so the
+        service works on them concurrently while short files (under
+        BATCH_UNARY_SECONDS) go through unary recognize on a thread pool.
+
+        Args:
+            audio_file_paths (List[str]): Paths to the audio files
+
+        Returns:
+            Dict[str, str]: Transcribed text per path (None where transcription failed)
+        """
+        transcripts = {}
+        operations = {}
+        short_files = {}
+
+        for path in audio_file_paths:
+            try:
+                with io.open(path, 'rb') as audio_file:
+                    content = audio_file.read()
+            except Exception as e:
+                print(f"Error in transcription: {str(e)}")
+                transcripts[path] = None
+                continue
+
+            key = self._transcript_key(content)
+            if key is not None:
+                transcript = self.disk_cache.get(key)
+                if transcript is not None:
+                    transcripts[path] = transcript
+                    continue
+
+            if self._audio_seconds(content) < BATCH_UNARY_SECONDS:
+                short_files[path] = content
+                continue
+            try:
+                operations[path] = (key, self._start_long_running(content))
+            except Exception as e:
+                print(f"Error in transcription: {str(e)}")
+                transcripts[path] = None
+
+        if short_files:
+            transcripts.update(zip(short_files, self.transcribe_batch(list(short_files.values()))))
+
+        for path, (key, operation) in operations.items():
+            try:
+                response = operation.result(timeout=LONG_RUNNING_TIMEOUT)
+                transcripts[path] = self._store_transcript(key, response)
+            except Exception as e:
+                print(f"Error in transcription: {str(e)}")
+                transcripts[path] = None
+
+        return {path: transcripts[path] for path in audio_file_paths}
+
+    async def transcribe_audio_file_async(self, audio_file_path):
+        """
+        Transcribe audio from a file without blocking the event loop
+
+        Args:
+            audio_file_path (str): Path to the audio file
+
+        Returns:
+            str: Transcribed text
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.transcribe_audio_file, audio_file_path)
+
+    async def transcribe_batch_async(self, audio_contents, max_concurrency=None):
+        """
+        Transcribe several pieces of raw audio concurrently from a coroutine
+
+        Args:
+            audio_contents (List[bytes]): Raw audio data, one entry per request
+            max_concurrency (int, optional): Requests in flight at once (default Config.API_CONCURRENCY)
+
+        Returns:
+            List[str]: Transcribed text per entry, in input order (None where transcription failed)
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(max_concurrency or Config.API_CONCURRENCY)
+
+        async def transcribe(audio_content):
+            async with semaphore:
+                return await loop.run_in_executor(None, self.transcribe_audio_stream, audio_content)
+
+        return list(await asyncio.gather(*(transcribe(content) for content in audio_contents)))
+
+    def warm_up(self, timeout=10):
+        """
+        Open the client's gRPC connection (TCP, TLS and HTTP/2 setup) ahead of the first request
+
+        No RPC is sent, so nothing is billed. Meant to run on a background thread at startup.
+
+        Args:
+            timeout (float): Seconds to wait for the connection
+
+        Returns:
+            bool: True if the channel is ready
+        """
+        import grpc
+        try:
+            grpc.channel_ready_future(self.client.transport.grpc_channel).result(timeout=timeout)
+            return True
+        except grpc.FutureTimeoutError:
+            print(f"Could not pre-connect for transcription within {timeout}s")
+        except Exception as e:
+            print(f"Could not pre-connect for transcription: {str(e)}")
+        return False
+
     def transcribe_streaming(self, audio_generator):
         """
         Transcribe audio stream in real-time
@@ -87,13 +334,13 @@ class SpeechToText:
             str: Transcribed text chunks
         """
         try:
-            streaming_config = speech.StreamingRecognitionConfig(
+            streaming_config = self._speech.StreamingRecognitionConfig(
                 config=self.config,
                 interim_results=True
             )
 
             requests = (
-                speech.StreamingRecognizeRequest(audio_content=chunk)
+                self._speech.StreamingRecognizeRequest(audio_content=chunk)
                 for chunk in audio_generator
             )
 
@@ -1,19 +1,86 @@
 """
 Text-to-Speech module using Google Cloud Text-to-Speech API
 """
+import asyncio
 import os
-from google.cloud import texttospeech
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from config.settings import Config
 
+# Try to import diskcache - it's optional
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
+# One client (and so one gRPC channel) per process, shared by every TextToSpeech
+_client = None
+_client_lock = threading.Lock()
+
+
+def _get_client():
+    """Create the process-wide TextToSpeechClient on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from google.cloud import texttospeech
+                from google.cloud.texttospeech_v1.services.text_to_speech.transports import (
+                    TextToSpeechGrpcTransport
+                )
+                # One keepalive-tuned channel that every concurrent request multiplexes over
+                channel = TextToSpeechGrpcTransport.create_channel(
+                    'texttospeech.googleapis.com:443', options=list(Config.GRPC_CHANNEL_OPTIONS)
+                )
+                _client = texttospeech.TextToSpeechClient(
+                    transport=TextToSpeechGrpcTransport(channel=channel)
+                )
+    return _client
+
+
+# Synthesized clips kept per TextToSpeech instance, in LRU order
+TTS_CACHE_SIZE = 256
+
+# Output formats: AudioEncoding name, file extension, MIME type and sample rate (None = voice default).
+# OGG_OPUS carries speech in roughly half the bytes of MP3, so network-bound clients
+# get shorter synthesis round-trips; LINEAR16 (WAV) skips decoding for local playback.
+AUDIO_ENCODINGS = {
+    'mp3': ('MP3', 'mp3', 'audio/mpeg', None),
+    'opus': ('OGG_OPUS', 'ogg', 'audio/ogg', 24000),
+    'linear16': ('LINEAR16', 'wav', 'audio/wav', 24000),
+}
+
+# Streaming synthesis returns raw 16-bit mono PCM at this rate
+STREAMING_SAMPLE_RATE = 24000
+
 
 class TextToSpeech:
-    def __init__(self):
-        """Initialize the Text-to-Speech client"""
+    def __init__(self, encoding=None):
+        """
+        Initialize the Text-to-Speech client
+
+        Args:
+            encoding (str, optional): Output format, 'mp3', 'opus' or 'linear16'
+                (default Config.TTS_AUDIO_ENCODING)
+        """
+        encoding = (encoding or Config.TTS_AUDIO_ENCODING).lower()
+        if encoding not in AUDIO_ENCODINGS:
+            raise ValueError(f"Unsupported audio encoding: {encoding}")
+        encoding_name, self.file_extension, self.mime_type, sample_rate = AUDIO_ENCODINGS[encoding]
+
+        # Imported here rather than at module level: the generated protobuf code takes
+        # a fifth of a second to load, which callers that never synthesize shouldn't pay
+        from google.cloud import texttospeech
+        self._texttospeech = texttospeech
+
         # Set credentials
         if Config.GOOGLE_APPLICATION_CREDENTIALS:
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = Config.GOOGLE_APPLICATION_CREDENTIALS
 
-        self.client = texttospeech.TextToSpeechClient()
+        self.client = _get_client()
 
         # Configure voice parameters
         self.voice = texttospeech.VoiceSelectionParams(
@@ -24,45 +91,219 @@ class TextToSpeech:
 
         # Configure audio output
         self.audio_config = texttospeech.AudioConfig(
-            audio_encoding=texttospeech.AudioEncoding.MP3,
+            audio_encoding=getattr(texttospeech.AudioEncoding, encoding_name),
+            sample_rate_hertz=sample_rate or 0,
             speaking_rate=1.0,
             pitch=0.0
         )
 
-    def synthesize_speech(self, text, output_file=None):
+        # Audio keyed by the input and every voice/audio setting, so voice changes can't hit stale entries
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        # Second tier on disk, so repeated phrases survive restarts
+        self.disk_cache = None
+        if DISKCACHE_AVAILABLE and Config.SPEECH_CACHE_DIR:
+            try:
+                self.disk_cache = diskcache.Cache(os.path.join(Config.SPEECH_CACHE_DIR, 'tts'))
+            except Exception as e:
+                print(f"Speech audio cache unavailable: {str(e)}")
+
+    def _cache_key(self, kind, content):
+        """Hash of the synthesis input together with the current voice and audio settings"""
+        parts = (
+            kind, content,
+            self.voice.language_code, self.voice.name, int(self.voice.ssml_gender),
+            int(self.audio_config.audio_encoding), self.audio_config.sample_rate_hertz,
+            self.audio_config.speaking_rate, self.audio_config.pitch
+        )
+        return hashlib.blake2b('\0'.join(map(str, parts)).encode('utf-8'), digest_size=16).digest()
+
+    def _synthesize_cached(self, kind, content):
         """
-        Convert text to speech
+        Synthesize text or SSML, reusing the audio from an identical earlier request
 
         Args:
-            text (str): Text to convert to speech
-            output_file (str, optional): Path to save audio file. If None, returns audio content
+            kind (str): 'text' or 'ssml'
+            content (str): Input of that kind
 
         Returns:
-            bytes or str: Audio content bytes if output_file is None, else path to saved file
+            bytes: Audio content bytes (API errors propagate to the caller)
         """
-        try:
-            # Create synthesis input
-            synthesis_input = texttospeech.SynthesisInput(text=text)
+        key = self._cache_key(kind, content)
+        with self._cache_lock:
+            audio_content = self._cache.get(key)
+            if audio_content is not None:
+                self._cache.move_to_end(key)
+                return audio_content
+
+        if self.disk_cache is not None:
+            audio_content = self.disk_cache.get(key)
 
+        if audio_content is None:
             # Perform text-to-speech request
             response = self.client.synthesize_speech(
-                input=synthesis_input,
+                input=self._texttospeech.SynthesisInput(**{kind: content}),
                 voice=self.voice,
                 audio_config=self.audio_config
             )
+            audio_content = response.audio_content
+            if self.disk_cache is not None:
+                self.disk_cache.set(key, audio_content, expire=Config.SPEECH_CACHE_TTL)
 
-            # Save or return audio content
-            if output_file:
-                with open(output_file, 'wb') as out:
-                    out.write(response.audio_content)
-                return output_file
-            else:
-                return response.audio_content
+        with self._cache_lock:
+            self._cache[key] = audio_content
+            self._cache.move_to_end(key)
+            while len(self._cache) > TTS_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return audio_content
+
+    def synthesize_speech_bytes(self, text):
+        """
+        Convert text to speech without touching the filesystem
+
+        Args:
+            text (str): Text to convert to speech
+
+        Returns:
+            bytes: Audio content bytes, or None if synthesis failed
+        """
+        try:
+            return self._synthesize_cached('text', text)
 
         except Exception as e:
             print(f"Error in speech synthesis: {str(e)}")
             return None
 
+    def synthesize_speech(self, text, output_file=None):
+        """
+        Convert text to speech
+
+        Args:
+            text (str): Text to convert to speech
+            output_file (str, optional): Path to save audio file. If None, returns audio content
+
+        Returns:
+            bytes or str: Audio content bytes if output_file is None, else path to saved file
+        """
+        audio_content = self.synthesize_speech_bytes(text)
+
+        # Save or return audio content
+        if audio_content is None or not output_file:
+            return audio_content
+
+        try:
+            with open(output_file, 'wb') as out:
+                out.write(audio_content)
+            return output_file
+
+        except Exception as e:
+            print(f"Error in speech synthesis: {str(e)}")
+            return None
+
+    async def synthesize_speech_async(self, text, output_file=None):
+        """
+        Convert text to speech without blocking the event loop
+
+        Args:
+            text (str): Text to convert to speech
+            output_file (str, optional): Path to save audio file. If None, returns audio content
+
+        Returns:
+            bytes or str: Audio content bytes if output_file is None, else path to saved file
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.synthesize_speech, text, output_file)
+
+    def synthesize_sentences(self, sentences, executor=None):
+        """
+        Synthesize text that is produced a sentence at a time (e.g. a streamed AI reply)
+
+        Each sentence is submitted for synthesis as soon as it arrives, so audio for the
+        first sentences is ready while later ones are still being generated. MP3 clips
+        join by concatenation; other encodings are synthesized once the text is complete.
+
+        Args:
+            sentences (Iterable[str]): Sentences in speaking order
+            executor (Executor, optional): Shared executor to run the requests on.
+                A temporary thread pool is used if not given.
+
+        Returns:
+            bytes: Audio for all sentences, or None if synthesis failed
+        """
+        if self.audio_config.audio_encoding != self._texttospeech.AudioEncoding.MP3:
+            return self.synthesize_speech_bytes(' '.join(sentences))
+
+        def synthesize_all(pool):
+            futures = [pool.submit(self.synthesize_speech_bytes, sentence) for sentence in sentences]
+            return [future.result() for future in futures]
+
+        if executor is not None:
+            clips = synthesize_all(executor)
+        else:
+            with ThreadPoolExecutor(max_workers=Config.API_CONCURRENCY) as temporary_executor:
+                clips = synthesize_all(temporary_executor)
+
+        if not clips or None in clips:
+            return None
+        return b''.join(clips)
+
+    def stream_synthesize(self, text_chunks):
+        """
+        Convert text to speech with the streaming endpoint, yielding audio as it is produced
+
+        Playback can start on the first chunk instead of waiting for the whole clip.
+        Only streaming-capable voices (e.g. Chirp 3 HD) are accepted; select one with
+        change_voice(). Results are not cached.
+
+        Args:
+            text_chunks (str or Iterable[str]): Text, or successive pieces of it (e.g. LLM output)
+
+        Yields:
+            bytes: LINEAR16 mono PCM chunks at STREAMING_SAMPLE_RATE
+        """
+        if isinstance(text_chunks, str):
+            text_chunks = (text_chunks,)
+
+        streaming_config = self._texttospeech.StreamingSynthesizeConfig(voice=self.voice)
+
+        def requests():
+            # The first request carries the config, the rest carry text
+            yield self._texttospeech.StreamingSynthesizeRequest(streaming_config=streaming_config)
+            for text in text_chunks:
+                yield self._texttospeech.StreamingSynthesizeRequest(
+                    input=self._texttospeech.StreamingSynthesisInput(text=text)
+                )
+
+        try:
+            for response in self.client.streaming_synthesize(requests()):
+                yield response.audio_content
+
+        except Exception as e:
+            print(f"Error in streaming speech synthesis: {str(e)}")
+
+    def warm_up(self, timeout=10):
+        """
+        Open the client's gRPC connection (TCP, TLS and HTTP/2 setup) ahead of the first request
+
+        No RPC is sent, so nothing is billed. Meant to run on a background thread at startup.
+
+        Args:
+            timeout (float): Seconds to wait for the connection
+
+        Returns:
+            bool: True if the channel is ready
+        """
+        import grpc
+        try:
+            grpc.channel_ready_future(self.client.transport.grpc_channel).result(timeout=timeout)
+            return True
+        except grpc.FutureTimeoutError:
+            print(f"Could not pre-connect for synthesis within {timeout}s")
+        except Exception as e:
+            print(f"Could not pre-connect for synthesis: {str(e)}")
+        return False
+
     def synthesize_ssml(self, ssml_text, output_file=None):
         """
         Convert SSML formatted text to speech
@@ -75,23 +316,15 @@ class TextToSpeech:
             bytes or str: Audio content bytes or file path
         """
         try:
-            # Create SSML synthesis input
-            synthesis_input = texttospeech.SynthesisInput(ssml=ssml_text)
-
-            # Perform text-to-speech request
-            response = self.client.synthesize_speech(
-                input=synthesis_input,
-                voice=self.voice,
-                audio_config=self.audio_config
-            )
+            audio_content = self._synthesize_cached('ssml', ssml_text)
 
             # Save or return audio content
             if output_file:
                 with open(output_file, 'wb') as out:
-                    out.write(response.audio_content)
+                    out.write(audio_content)
                 return output_file
             else:
-                return response.audio_content
+                return audio_content
 
         except Exception as e:
             print(f"Error in SSML speech synthesis: {str(e)}")
@@ -114,11 +347,11 @@ class TextToSpeech:
 
         if gender:
             gender_map = {
-                'MALE': texttospeech.SsmlVoiceGender.MALE,
-                'FEMALE': texttospeech.SsmlVoiceGender.FEMALE,
-                'NEUTRAL': texttospeech.SsmlVoiceGender.NEUTRAL
+                'MALE': self._texttospeech.SsmlVoiceGender.MALE,
+                'FEMALE': self._texttospeech.SsmlVoiceGender.FEMALE,
+                'NEUTRAL': self._texttospeech.SsmlVoiceGender.NEUTRAL
             }
-            self.voice.ssml_gender = gender_map.get(gender.upper(), texttospeech.SsmlVoiceGender.NEUTRAL)
+            self.voice.ssml_gender = gender_map.get(gender.upper(), gender_map['NEUTRAL'])
 
     def adjust_audio_settings(self, speaking_rate=None, pitch=None):
         """
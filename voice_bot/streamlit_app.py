@@ -4,10 +4,10 @@ A modern, interactive web UI with database integration and performance monitorin
 """
 import os
 import sys
-import base64
-import tempfile
+import threading
 import time
 from datetime import datetime
+import pandas as pd
 import streamlit as st
 from audio_recorder_streamlit import audio_recorder
 
@@ -31,8 +31,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS
-st.markdown("""
+# Custom CSS (a constant; Streamlit drops elements a rerun doesn't emit, so it is re-sent each run)
+CUSTOM_CSS = """
 <style>
     .main { padding: 0rem 1rem; }
     .stButton>button {
@@ -47,31 +47,6 @@ st.markdown("""
         background-color: #5568d3;
         border-color: #5568d3;
     }
-    .chat-message {
-        padding: 1.5rem;
-        border-radius: 10px;
-        margin-bottom: 1rem;
-        display: flex;
-        flex-direction: column;
-    }
-    .user-message {
-        background-color: #667eea;
-        color: white;
-        margin-left: 20%;
-    }
-    .bot-message {
-        background-color: #f0f2f6;
-        margin-right: 20%;
-    }
-    .message-header {
-        font-weight: bold;
-        margin-bottom: 0.5rem;
-        font-size: 0.9em;
-    }
-    .message-content {
-        font-size: 1em;
-        line-height: 1.5;
-    }
     .info-box {
         background-color: #e8eaf6;
         padding: 1rem;
@@ -79,27 +54,6 @@ st.markdown("""
         border-left: 4px solid #667eea;
         margin: 1rem 0;
     }
-    .intent-badge {
-        display: inline-block;
-        padding: 0.3rem 0.8rem;
-        border-radius: 12px;
-        background-color: #667eea;
-        color: white;
-        font-size: 0.8em;
-        margin-right: 0.5rem;
-    }
-    .confidence-bar {
-        height: 8px;
-        background-color: #e0e0e0;
-        border-radius: 4px;
-        overflow: hidden;
-        margin-top: 0.5rem;
-    }
-    .confidence-fill {
-        height: 100%;
-        background-color: #667eea;
-        transition: width 0.3s ease;
-    }
     .metric-card {
         background-color: #f8f9fa;
         padding: 1rem;
@@ -107,7 +61,8 @@ st.markdown("""
         border: 1px solid #dee2e6;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 
 # Initialize session state
@@ -119,38 +74,75 @@ if 'show_analysis' not in st.session_state:
     st.session_state.show_analysis = True
 if 'use_ai_responses' not in st.session_state:
     st.session_state.use_ai_responses = False
+if 'show_full_history' not in st.session_state:
+    st.session_state.show_full_history = False
+
+# Most recent chat messages rendered on each rerun; older ones are shown on request
+CHAT_DISPLAY_LIMIT = 50
+
+
+# Each component is cached on its own, so rebuilding one (e.g. the response
+# generator for a new OpenAI key) leaves the others and their clients in place
+@st.cache_resource
+def get_database():
+    """Shared database"""
+    return Database()
+
+
+@st.cache_resource
+def get_analytics():
+    """Shared analytics tracker, logging to the shared database"""
+    return AnalyticsTracker(database=get_database())
+
+
+@st.cache_resource
+def get_stt():
+    """Shared Speech-to-Text client, connected in the background before the first turn"""
+    stt = SpeechToText()
+    threading.Thread(target=stt.warm_up, name='stt-warm-up', daemon=True).start()
+    return stt
+
+
+@st.cache_resource
+def get_tts():
+    """Shared Text-to-Speech client, connected in the background before the first turn"""
+    tts = TextToSpeech()
+    threading.Thread(target=tts.warm_up, name='tts-warm-up', daemon=True).start()
+    return tts
+
+
+@st.cache_resource
+def get_intent_recognizer():
+    """Shared intent recognizer"""
+    return IntentRecognizer()
 
 
 @st.cache_resource
+def get_response_generator(use_ai, api_key):
+    """Shared response generator for one AI setting"""
+    return AdvancedResponseGenerator(
+        use_ai_model=use_ai,
+        api_key=api_key,
+        database=get_database()
+    )
+
+
 def initialize_bot():
     """Initialize the voice bot components"""
     try:
         Config.validate()
 
-        # Initialize database
-        db = Database()
-
-        # Initialize analytics tracker
-        analytics = AnalyticsTracker(database=db)
-
         # Check for OpenAI API key
         openai_key = os.getenv('OPENAI_API_KEY')
         use_ai = openai_key is not None
 
-        # Initialize advanced response generator
-        response_gen = AdvancedResponseGenerator(
-            use_ai_model=use_ai,
-            api_key=openai_key,
-            database=db
-        )
-
         return {
-            'stt': SpeechToText(),
-            'tts': TextToSpeech(),
-            'intent_recognizer': IntentRecognizer(),
-            'response_generator': response_gen,
-            'database': db,
-            'analytics': analytics,
+            'stt': get_stt(),
+            'tts': get_tts(),
+            'intent_recognizer': get_intent_recognizer(),
+            'response_generator': get_response_generator(use_ai, openai_key),
+            'database': get_database(),
+            'analytics': get_analytics(),
             'initialized': True,
             'ai_available': use_ai
         }
@@ -159,15 +151,27 @@ def initialize_bot():
         return {'initialized': False, 'error': str(e)}
 
 
-def autoplay_audio(audio_bytes):
-    """Autoplay audio in the browser"""
-    audio_base64 = base64.b64encode(audio_bytes).decode()
-    audio_html = f"""
-    <audio autoplay>
-        <source src="data:audio/mp3;base64,{audio_base64}" type="audio/mp3">
-    </audio>
+@st.cache_data(ttl=3600, max_entries=1024, show_spinner=False)
+def classify_query(text, recognizer_id, _recognizer):
+    """
+    Intent, confidence and entities for a query, cached per text
+
+    Only the stateless part of IntentRecognizer.analyze_query is cached; the caller
+    still updates the conversation context. recognizer_id keys entries to the
+    recognizer instance (the underscore argument itself is not hashed).
     """
-    st.markdown(audio_html, unsafe_allow_html=True)
+    intent, confidence = _recognizer.recognize_intent(text)
+    return intent, confidence, _recognizer.extract_entities(text)
+
+
+def autoplay_audio(audio_bytes, mime_type='audio/mpeg'):
+    """Autoplay audio in the browser"""
+    if not audio_bytes:
+        return
+    # Served from Streamlit's media endpoint by URL (with Range support), so the
+    # browser can start playback before the whole clip arrives and the page
+    # doesn't carry a base64 copy of it
+    st.audio(audio_bytes, format=mime_type, autoplay=True)
 
 
 def process_message(user_input, bot_components, is_audio=False):
@@ -178,14 +182,9 @@ def process_message(user_input, bot_components, is_audio=False):
 
     try:
         with st.spinner('Processing your message...'):
-            # If audio, transcribe first
+            # If audio, transcribe first (straight from memory, no temp file)
             if is_audio:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as tmp_file:
-                    tmp_file.write(user_input)
-                    tmp_path = tmp_file.name
-
-                user_text = bot_components['stt'].transcribe_audio_file(tmp_path)
-                os.unlink(tmp_path)
+                user_text = bot_components['stt'].transcribe_audio_stream(user_input)
 
                 if not user_text:
                     st.error("Failed to transcribe audio")
@@ -194,26 +193,34 @@ def process_message(user_input, bot_components, is_audio=False):
                 user_text = user_input
 
             # Analyze intent
-            analysis = bot_components['intent_recognizer'].analyze_query(user_text)
-
-            # Generate response
-            response_text = bot_components['response_generator'].generate_response(
-                analysis['intent'],
-                analysis['entities'],
-                analysis['context'],
-                user_query=user_text
-            )
+            recognizer = bot_components['intent_recognizer']
+            intent, confidence, entities = classify_query(user_text, id(recognizer), recognizer)
+            recognizer.update_context(intent, entities)
+            analysis = {
+                'text': user_text,
+                'intent': intent,
+                'confidence': confidence,
+                'entities': entities,
+                'context': recognizer.get_context()
+            }
 
-            # Generate audio response
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_dir = os.path.join(os.path.dirname(__file__), 'data', 'audio')
-            os.makedirs(output_dir, exist_ok=True)
+            # Generate the response a sentence at a time and synthesize each sentence
+            # while the next is still being generated
+            sentences = []
 
-            audio_file = os.path.join(output_dir, f'response_{timestamp}.mp3')
-            bot_components['tts'].synthesize_speech(response_text, audio_file)
+            def response_sentences():
+                for sentence in bot_components['response_generator'].generate_response_sentences(
+                    analysis['intent'],
+                    analysis['entities'],
+                    analysis['context'],
+                    user_query=user_text
+                ):
+                    sentences.append(sentence)
+                    yield sentence
 
-            with open(audio_file, 'rb') as f:
-                audio_bytes = f.read()
+            # Audio is generated in memory; it is only ever played back inline
+            audio_bytes = bot_components['tts'].synthesize_sentences(response_sentences())
+            response_text = ' '.join(sentences)
 
             response_time = time.time() - start_time
 
@@ -270,33 +277,30 @@ def process_message(user_input, bot_components, is_audio=False):
 
 def display_message(role, content, intent=None, confidence=None, response_time=None):
     """Display a chat message"""
-    css_class = "user-message" if role == "user" else "bot-message"
-    icon = "[User]" if role == "user" else "[Bot]"
+    with st.chat_message(role):
+        st.markdown(content)
 
-    message_html = f"""
-    <div class="chat-message {css_class}">
-        <div class="message-header">{icon} {role.title()}</div>
-        <div class="message-content">{content}</div>
-    """
+        if intent and confidence is not None:
+            details = f"Intent: `{intent}` | Confidence: {confidence:.0%}"
+            if response_time:
+                details += f" | Response time: {response_time:.2f}s"
+            st.caption(details)
+            st.progress(min(max(float(confidence), 0.0), 1.0))
 
-    if intent and confidence is not None:
-        message_html += f"""
-        <div style="margin-top: 0.8rem; font-size: 0.85em; opacity: 0.9;">
-            <span class="intent-badge">{intent}</span>
-            <span>Confidence: {confidence:.0%}</span>
-        """
-        if response_time:
-            message_html += f" | Response time: {response_time:.2f}s"
-
-        message_html += """
-            <div class="confidence-bar">
-                <div class="confidence-fill" style="width: {:.0%};"></div>
-            </div>
-        </div>
-        """.format(confidence)
 
-    message_html += "</div>"
-    st.markdown(message_html, unsafe_allow_html=True)
+@st.cache_data(ttl=5, show_spinner=False)
+def intent_distribution_frame(distribution):
+    """Query counts per intent as a DataFrame, rebuilt only when the counts change"""
+    return pd.DataFrame.from_records(list(distribution), columns=['Intent', 'Queries']).set_index('Intent')
+
+
+@st.cache_data(ttl=5, show_spinner=False)
+def intent_performance_frame(performance):
+    """Per-intent performance as a DataFrame, rebuilt only when the statistics change"""
+    return pd.DataFrame.from_records(
+        list(performance),
+        columns=['Intent', 'Count', 'Avg Response Time', 'Avg Confidence', 'Success Rate']
+    ).set_index('Intent')
 
 
 def show_analytics_dashboard(bot_components):
@@ -324,24 +328,26 @@ def show_analytics_dashboard(bot_components):
     # Intent distribution
     if stats['intent_distribution']:
         st.subheader("Intent Distribution")
-        st.bar_chart(stats['intent_distribution'])
+        st.bar_chart(intent_distribution_frame(tuple(stats['intent_distribution'].items())))
 
     # Intent performance
     intent_perf = analytics.get_intent_performance()
     if intent_perf:
         st.subheader("Intent Performance")
 
-        perf_data = []
-        for intent, data in intent_perf.items():
-            perf_data.append({
-                'Intent': intent,
-                'Count': data['count'],
-                'Avg Response Time': f"{data['avg_response_time']:.2f}s",
-                'Avg Confidence': f"{data['avg_confidence']:.0%}",
-                'Success Rate': f"{data['success_rate']:.1f}%"
-            })
-
-        st.table(perf_data)
+        # Formatting is left to the column config, so the frame holds plain numbers
+        st.dataframe(
+            intent_performance_frame(tuple(
+                (intent, data['count'], data['avg_response_time'],
+                 data['avg_confidence'] * 100, data['success_rate'])
+                for intent, data in intent_perf.items()
+            )),
+            column_config={
+                'Avg Response Time': st.column_config.NumberColumn(format="%.2fs"),
+                'Avg Confidence': st.column_config.NumberColumn(format="%.0f%%"),
+                'Success Rate': st.column_config.NumberColumn(format="%.1f%%")
+            }
+        )
 
     # Error summary
     error_summary = analytics.get_error_summary()
@@ -475,6 +481,7 @@ def main():
 
         if st.button("Clear Chat"):
             st.session_state.messages = []
+            st.session_state.show_full_history = False
             st.rerun()
 
         st.markdown("---")
@@ -513,10 +520,19 @@ def main():
         </div>
         """, unsafe_allow_html=True)
 
-    # Display chat messages
+    # Display chat messages (only the latest CHAT_DISPLAY_LIMIT unless asked, so a
+    # long session doesn't re-render its whole history on every rerun)
+    messages = st.session_state.messages
+    hidden = len(messages) - CHAT_DISPLAY_LIMIT
+    if hidden > 0 and not st.session_state.show_full_history:
+        if st.button(f"Show {hidden} earlier messages"):
+            st.session_state.show_full_history = True
+            st.rerun()
+        messages = messages[-CHAT_DISPLAY_LIMIT:]
+
     chat_container = st.container()
     with chat_container:
-        for message in st.session_state.messages:
+        for message in messages:
             display_message(
                 message['role'],
                 message['content'],
@@ -571,7 +587,7 @@ def main():
                 'response_time': result['response_time']
             })
 
-            autoplay_audio(result['audio_bytes'])
+            autoplay_audio(result['audio_bytes'], bot_components['tts'].mime_type)
             st.rerun()
 
     # Process voice input
@@ -592,7 +608,7 @@ def main():
                 'response_time': result['response_time']
             })
 
-            autoplay_audio(result['audio_bytes'])
+            autoplay_audio(result['audio_bytes'], bot_components['tts'].mime_type)
             st.rerun()
 
 
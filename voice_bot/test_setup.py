@@ -3,6 +3,14 @@ Test script to verify Voice Bot installation and configuration
 """
 import sys
 import os
+import importlib
+import importlib.util
+
+# Add parent directory to path (once, for every check below)
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
 
 def test_python_version():
     """Test Python version"""
@@ -16,6 +24,32 @@ def test_python_version():
         return False
 
 
+def _check_imports(modules):
+    """
+    Import each module, reporting ✓/✗ per module
+
+    Missing packages are detected with find_spec, without paying for an import attempt.
+
+    Args:
+        modules (List[Tuple[str, str]]): (module name, display name) pairs
+
+    Returns:
+        bool: True if every module imported
+    """
+    all_passed = True
+    for module_name, display_name in modules:
+        try:
+            if importlib.util.find_spec(module_name) is None:
+                raise ImportError(f"No module named '{module_name}'")
+            importlib.import_module(module_name)
+            print(f"  ✓ {display_name}")
+        except ImportError as e:
+            print(f"  ✗ {display_name} - {str(e)}")
+            all_passed = False
+
+    return all_passed
+
+
 def test_imports():
     """Test if all required modules can be imported"""
     print("\nTesting module imports...")
@@ -27,50 +61,26 @@ def test_imports():
         ('dotenv', 'python-dotenv'),
     ]
 
-    all_passed = True
-    for module_name, display_name in modules_to_test:
-        try:
-            __import__(module_name)
-            print(f"  ✓ {display_name}")
-        except ImportError as e:
-            print(f"  ✗ {display_name} - {str(e)}")
-            all_passed = False
-
-    return all_passed
+    return _check_imports(modules_to_test)
 
 
 def test_project_modules():
     """Test if project modules can be imported"""
     print("\nTesting project modules...")
 
-    # Add parent directory to path
-    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
     project_modules = [
         ('modules.intent_recognizer', 'IntentRecognizer'),
         ('modules.response_generator', 'ResponseGenerator'),
         ('modules.audio_recorder', 'AudioRecorder'),
     ]
 
-    all_passed = True
-    for module_name, display_name in project_modules:
-        try:
-            __import__(module_name)
-            print(f"  ✓ {display_name}")
-        except ImportError as e:
-            print(f"  ✗ {display_name} - {str(e)}")
-            all_passed = False
-
-    return all_passed
+    return _check_imports(project_modules)
 
 
 def test_google_cloud_modules():
     """Test if Google Cloud modules can be imported (may fail without credentials)"""
     print("\nTesting Google Cloud modules...")
 
-    # Add parent directory to path
-    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
     all_passed = True
 
     # Test Speech-to-Text
@@ -98,8 +108,6 @@ def test_config():
     """Test configuration"""
     print("\nTesting configuration...")
 
-    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
     try:
         from config.settings import Config
 
@@ -136,8 +144,6 @@ def test_intent_recognition():
     """Test intent recognition functionality"""
     print("\nTesting intent recognition...")
 
-    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
     try:
         from modules.intent_recognizer import IntentRecognizer
 
@@ -162,8 +168,6 @@ def test_response_generation():
     """Test response generation functionality"""
     print("\nTesting response generation...")
 
-    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
     try:
         from modules.response_generator import ResponseGenerator
 
@@ -0,0 +1,17 @@
+"""
+WSGI entry point for serving the Voice Bot API in production
+
+Run with gevent workers so concurrent requests overlap their Google Cloud calls:
+    gunicorn --preload -k gevent -w 4 --worker-connections 1000 -b 0.0.0.0:5000 wsgi:application
+"""
+# Patch the standard library before anything opens sockets
+from gevent import monkey
+monkey.patch_all()
+
+# Let the gRPC-based Google Cloud clients cooperate with the gevent loop
+import grpc.experimental.gevent as grpc_gevent
+grpc_gevent.init_gevent()
+
+from app import app
+
+application = app